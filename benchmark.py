@@ -1,62 +1,170 @@
 """
 Benchmark: FastAPI + datastar-py vs Stario 2.0
 """
+import argparse
+import atexit
 import subprocess
+import threading
 import time
 import httpx
 import statistics
 import os
 import psutil
+from concurrent.futures import ThreadPoolExecutor
 
 FASTAPI_PORT = 8000
 STARIO_PORT = 8001
+FASTAPI_PID_FILE = "/tmp/datastar-fastapi.pid"
+STARIO_PID_FILE = "/tmp/datastar-stario.pid"
 ITERATIONS = 50
 
+# Adaptive warmup: keep going until the last WARMUP_WINDOW timings have a
+# coefficient of variation below WARMUP_CV (bounded by WARMUP_MIN/WARMUP_MAX)
+WARMUP_WINDOW = 20
+WARMUP_CV = 0.05
+WARMUP_MIN = 20
+WARMUP_MAX = 500
+
+# One pooled client per thread so every request reuses a keep-alive connection
+# and the parallel FastAPI/Stario runs never share a connection pool
+_local = threading.local()
+
+def get_client():
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = httpx.Client(
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            headers={"Connection": "keep-alive"},
+        )
+        atexit.register(client.close)
+    return client
+
+def is_worker(proc):
+    """Whether a child serves requests, rather than being multiprocessing's resource tracker"""
+    try:
+        return "resource_tracker" not in " ".join(proc.cmdline())
+    except psutil.Error:
+        return False  # Exited or unreadable; nothing to count either way
+
 def get_memory_mb(pid):
+    """RSS of the server process plus the worker processes it spawned"""
     try:
-        return psutil.Process(pid).memory_info().rss / 1024 / 1024
+        proc = psutil.Process(pid)
+        # Workers (and the DEV reloader's server) are direct children; helpers like the tracker aren't workers
+        procs = [proc] + [child for child in proc.children() if is_worker(child)]
     except:
         return 0
+    total = 0
+    for p in procs:
+        try:
+            total += p.memory_info().rss
+        except:
+            pass  # Worker exited between listing and reading
+    return total / 1024 / 1024
 
-def benchmark_endpoint(url, name, iterations=ITERATIONS):
-    times = []
-    client = httpx.Client(timeout=10.0)
+def find_server_pid(pid_file, port):
+    """PID from the server's pid file, falling back to whoever listens on the port"""
+    try:
+        with open(pid_file) as f:
+            pid = int(f.read().strip())
+        if psutil.pid_exists(pid):
+            return pid
+    except (OSError, ValueError):
+        pass
+    try:
+        for conn in psutil.net_connections(kind="tcp4"):
+            if conn.laddr.port == port and conn.status == psutil.CONN_LISTEN and conn.pid:
+                return conn.pid
+    except psutil.AccessDenied:
+        pass
+    return None
 
-    # Warmup
-    for _ in range(3):
+def adaptive_warmup(client, url, window=WARMUP_WINDOW, tau=WARMUP_CV, n_min=WARMUP_MIN, n_max=WARMUP_MAX):
+    """Warm up until latency settles; returns (requests sent, final window CV)"""
+    times = []
+    cv = float("inf")
+    now, send = time.perf_counter_ns, client.send
+    request = client.build_request("GET", url)
+    while len(times) < n_max:
+        start = now()
         try:
-            client.get(url)
+            send(request)
         except:
             pass
+        times.append(now() - start)
+        if len(times) >= max(n_min, window):
+            recent = times[-window:]
+            mean = statistics.mean(recent)
+            cv = statistics.pstdev(recent) / mean if mean else 0
+            if cv < tau:
+                break
+    return len(times), cv
+
+def tukey_filter(times, k=1.5):
+    """Drop samples outside Tukey's fences [Q1 - k*IQR, Q3 + k*IQR]"""
+    if len(times) < 4:
+        return times
+    q1, _, q3 = statistics.quantiles(times, n=4)
+    iqr = q3 - q1
+    low, high = q1 - k * iqr, q3 + k * iqr
+    return [t for t in times if low <= t <= high]
+
+def benchmark_endpoint(url, name, iterations=ITERATIONS, client=None):
+    client = client or get_client()
+    times = []
+
+    warmup_n, warmup_cv = adaptive_warmup(client, url)
 
+    # Validate once up front so the timed loop is just send + clock reads
+    request = client.build_request("GET", url)
+    try:
+        resp = client.send(request)
+    except Exception:
+        return None
+    if resp.status_code != 200:
+        return None
+
+    # Integer nanosecond timer bound locally; convert to ms once the loop is done
+    now, send = time.perf_counter_ns, client.send
     for _ in range(iterations):
-        start = time.perf_counter()
+        start = now()
         try:
-            resp = client.get(url)
-            elapsed = (time.perf_counter() - start) * 1000
-            if resp.status_code == 200:
-                times.append(elapsed)
-        except Exception as e:
+            send(request)
+            times.append(now() - start)
+        except Exception:
             pass
-
-    client.close()
+    times = [t / 1e6 for t in times]
 
     if times:
+        # One GC pause or scheduler hiccup shouldn't decide the winner
+        kept = tukey_filter(times)
         return {
             "name": name,
-            "avg_ms": statistics.mean(times),
-            "min_ms": min(times),
-            "max_ms": max(times),
-            "std_ms": statistics.stdev(times) if len(times) > 1 else 0,
-            "count": len(times)
+            "avg_ms": statistics.mean(kept),
+            "min_ms": min(kept),
+            "max_ms": max(kept),
+            "std_ms": statistics.stdev(kept) if len(kept) > 1 else 0,
+            "p50_ms": statistics.median(kept),
+            "p95_ms": statistics.quantiles(kept, n=20)[18] if len(kept) > 1 else kept[0],
+            "count_raw": len(times),
+            "count_kept": len(kept),
+            "warmup_n": warmup_n,
+            "warmup_cv": warmup_cv,
         }
     return None
 
 def count_lines(filepath):
-    with open(filepath) as f:
-        return len([l for l in f if l.strip() and not l.strip().startswith('#')])
+    # Lines stream from the binary file object, one strip each; nothing holds the whole file
+    with open(filepath, "rb") as f:
+        return sum(1 for line in f if (s := line.strip()) and not s.startswith(b"#"))
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--serial", action="store_true",
+                        help="benchmark the servers one after another instead of in parallel")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("BENCHMARK: FastAPI + datastar-py vs Stario 2.0")
     print("=" * 60)
@@ -90,14 +198,22 @@ def main():
 
     results = {"fastapi": [], "stario": []}
 
+    # Each server gets its own thread and client; request waits release the GIL
+    executor = None if args.serial else ThreadPoolExecutor(max_workers=2)
+
     for path, name in endpoints:
-        # FastAPI
-        fa_result = benchmark_endpoint(f"http://127.0.0.1:{FASTAPI_PORT}{path}", f"FastAPI {name}")
+        fa_args = (f"http://127.0.0.1:{FASTAPI_PORT}{path}", f"FastAPI {name}")
+        st_args = (f"http://127.0.0.1:{STARIO_PORT}{path}", f"Stario {name}")
+        if executor:
+            fa_future = executor.submit(benchmark_endpoint, *fa_args)
+            st_future = executor.submit(benchmark_endpoint, *st_args)
+            fa_result, st_result = fa_future.result(), st_future.result()
+        else:
+            fa_result = benchmark_endpoint(*fa_args)
+            st_result = benchmark_endpoint(*st_args)
+
         if fa_result:
             results["fastapi"].append(fa_result)
-
-        # Stario
-        st_result = benchmark_endpoint(f"http://127.0.0.1:{STARIO_PORT}{path}", f"Stario {name}")
         if st_result:
             results["stario"].append(st_result)
 
@@ -109,23 +225,17 @@ def main():
             print(f"      Stario:  {st_result['avg_ms']:.2f}ms (+/-{st_result['std_ms']:.2f})")
             print(f"      Winner:  {faster} ({abs(diff):.1f}% faster)")
 
+    if executor:
+        executor.shutdown()
+
     # Memory comparison
     print("\n MEMORY USAGE:")
 
-    # Find PIDs - look for port-specific processes
-    fastapi_mem = stario_mem = None
-    for proc in psutil.process_iter(['pid', 'cmdline', 'memory_info']):
-        try:
-            cmd = ' '.join(proc.info['cmdline'] or [])
-            mem = proc.info['memory_info'].rss / 1024 / 1024
-            # FastAPI uvicorn worker (not master, not uv wrapper)
-            if '--port 8000' in cmd and 'uvicorn' in cmd:
-                fastapi_mem = mem
-            # Stario main process (not uv wrapper)
-            elif 'main_stario.py' in cmd and 'uv run' not in cmd:
-                stario_mem = mem
-        except:
-            pass
+    # Servers write their PID at startup; no need to walk every process on the box
+    fastapi_pid = find_server_pid(FASTAPI_PID_FILE, FASTAPI_PORT)
+    stario_pid = find_server_pid(STARIO_PID_FILE, STARIO_PORT)
+    fastapi_mem = get_memory_mb(fastapi_pid) if fastapi_pid else None
+    stario_mem = get_memory_mb(stario_pid) if stario_pid else None
     if fastapi_mem:
         print(f"   FastAPI: {fastapi_mem:.1f} MB")
     if stario_mem:
@@ -1,58 +1,164 @@
-from fastapi import FastAPI, Request
+from array import array
+from bisect import bisect_right
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from itertools import accumulate
+from fastapi import FastAPI, Query, Request
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from datastar_py import ServerSentEventGenerator as SSE
 from datastar_py.fastapi import DatastarResponse
 import asyncio
+import mmap
+import os
+import orjson
+import re
+import time
 import yfinance as yf
 import httpx
 
-app = FastAPI()
+# Set DEV=1 to re-render templates on every request while editing them
+DEV = os.environ.get("DEV") == "1"
+
 templates = Jinja2Templates(directory="templates")
 
-# Load dictionary at startup
-with open("/usr/share/dict/words") as f:
-    WORDS = [w.strip() for w in f.readlines()]
+# Written at startup so benchmark.py can find this process without scanning /proc
+PID_FILE = "/tmp/datastar-fastapi.pid"
 
-# Stock symbols and names
-STOCK_NAMES = {
-    "AAPL": "Apple Inc.",
-    "GOOGL": "Alphabet Inc.",
-    "MSFT": "Microsoft Corp.",
-    "TSLA": "Tesla Inc.",
-    "AMZN": "Amazon.com Inc.",
-}
+# Serving options; WORKERS > 1 forks uvicorn worker processes behind one listener
+PORT = int(os.environ.get("PORT", "8001"))
+WORKERS = int(os.environ.get("WORKERS", "1"))
 
+# Wire format of datastar-py's patch_signals, so frames can be built straight as bytes
+PATCH_SIGNALS_PREFIX = b"event: datastar-patch-signals\ndata: signals "
 
-@app.get("/", response_class=HTMLResponse)
-async def index(request: Request):
-    """Serve the progressive loading demo"""
-    return templates.TemplateResponse("index.html", {"request": request})
 
+def patch_signals(signals: dict) -> bytes:
+    """A ready-to-send patch-signals SSE frame, JSON-encoded by orjson"""
+    # orjson escapes newlines inside strings, so the JSON always fits one data line
+    return PATCH_SIGNALS_PREFIX + orjson.dumps(signals) + b"\n\n"
 
-@app.get("/typewriter", response_class=HTMLResponse)
-async def typewriter_page(request: Request):
-    """Serve the typewriter demo"""
-    return templates.TemplateResponse("typewriter.html", {"request": request})
 
+# Pages and stage fragments that don't depend on the request
+STATIC_PAGES = ("index.html", "typewriter.html", "ticker.html", "search.html")
 
-@app.get("/load/{stage}")
-async def load_stage(stage: str, request: Request):
-    """SSE endpoint to load a stage fragment with slight delay for visual effect"""
-    async def generate():
-        await asyncio.sleep(0.3)  # Slight delay for unpacking effect
-        stage_html = templates.get_template(f"stages/{stage}.html").render({"request": request})
-        yield SSE.patch_elements(stage_html)
-        yield SSE.patch_signals({"current_stage": stage})
 
-    return DatastarResponse(generate())
+@lru_cache(maxsize=64)
+def _render(name: str) -> bytes:
+    """Render a context-free template once; later calls are a cache lookup"""
+    return templates.get_template(name).render().encode()
 
 
-@app.get("/stream-typewriter")
-async def stream_typewriter():
-    """Stream content character by character like a typewriter"""
-    async def generate():
-        content = """
+@lru_cache(maxsize=64)
+def _stage_frames(stage: str) -> tuple[bytes, bytes]:
+    """Both SSE events for /load/{stage}, which never depend on the request"""
+    stage_html = templates.get_template(f"stages/{stage}.html").render()
+    return SSE.patch_elements(stage_html).encode(), patch_signals({"current_stage": stage})
+
+
+def render_page(name: str) -> bytes:
+    """Return rendered page bytes, cached unless in DEV mode"""
+    if DEV:
+        return templates.get_template(name).render().encode()
+    return _render(name)
+
+
+def stage_frames(stage: str) -> tuple[bytes, bytes]:
+    """Return the stage SSE events, cached unless in DEV mode"""
+    if DEV:
+        return _stage_frames.__wrapped__(stage)
+    return _stage_frames(stage)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the render caches so the first requests skip Jinja too"""
+    for name in STATIC_PAGES:
+        _render(name)
+    for filename in os.listdir("templates/stages"):
+        if filename.endswith(".html"):
+            _stage_frames(filename.removesuffix(".html"))
+    yield
+    await http_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Load dictionary at startup
+with open("/usr/share/dict/words", "rb") as f:
+    # Dictionary stays memory-mapped; only the words actually shown get decoded into str
+    DICT = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+_raw = DICT[:-1] if DICT[-1:] == b"\n" else DICT[:]
+# Start of each line in DICT, plus a sentinel one past the end
+DICT_OFFSETS = array("I", accumulate((len(line) + 1 for line in _raw.split(b"\n")), initial=0))
+
+# Lowercased dictionary as one newline-joined blob, so search is a C-level bytes.find loop
+LOWER_BLOB = _raw.decode().lower().encode()
+WORD_OFFSETS = array("I", accumulate((len(line) + 1 for line in LOWER_BLOB.split(b"\n")), initial=0))
+if WORD_OFFSETS == DICT_OFFSETS:
+    WORD_OFFSETS = DICT_OFFSETS  # Lowercasing kept every word's byte length; share one table
+del _raw
+
+# Search results patch frame, minus the items: the same bytes SSE.patch_elements would build
+RESULTS_FRAME_PREFIX = b'event: datastar-patch-elements\ndata: elements <div id="results"><ul>'
+RESULTS_FRAME_SUFFIX = b"</ul></div>\n\n"
+
+# Most recent search, its result and matched word indices: served again if the same query
+# repeats, and narrowed instead of rescanned when the next keystroke extends it
+LAST_SEARCH: dict = {"query": None, "result": None, "indices": []}
+
+
+def word_at(i: int) -> str:
+    """Dictionary word i, sliced out of the mapped file"""
+    return DICT[DICT_OFFSETS[i]:DICT_OFFSETS[i + 1] - 1].decode().strip()
+
+
+def find_matches(query: str, limit: int) -> tuple[list[tuple[str, int]], int]:
+    """Words containing the lowercased query as (word, match index), plus the total count"""
+    if LAST_SEARCH["query"] == query:
+        return LAST_SEARCH["result"]  # Same query again (re-fired input, another visitor): no rescan
+    qb = query.encode()
+    matches = []
+    if b"\n" in qb:
+        return matches, 0
+    find = LOWER_BLOB.find
+    indices = []
+    previous = LAST_SEARCH["query"]
+    if previous is not None and previous in query and len(LAST_SEARCH["indices"]) == LAST_SEARCH["result"][1]:
+        # Typing onward from a query whose hits all fit under the limit: any word containing
+        # this query contains that one too, so only those few words need checking
+        for i in LAST_SEARCH["indices"]:
+            start = WORD_OFFSETS[i]
+            pos = find(qb, start, WORD_OFFSETS[i + 1])
+            if pos >= 0:
+                indices.append(i)
+                matches.append((word_at(i), len(LOWER_BLOB[start:pos].decode())))
+        count = len(matches)
+    else:
+        pos = find(qb)
+        while pos >= 0 and len(matches) < limit:
+            i = bisect_right(WORD_OFFSETS, pos) - 1
+            start = WORD_OFFSETS[i]
+            indices.append(i)
+            matches.append((word_at(i), len(LOWER_BLOB[start:pos].decode())))
+            # Resume at the next word so a word matching twice is only counted once
+            pos = find(qb, WORD_OFFSETS[i + 1])
+        count = len(matches)
+        if pos >= 0:
+            # Count the remaining words inside the regex engine: each match runs to the end
+            # of its line, and the empty group makes findall return shared b"" items
+            count += len(re.compile(re.escape(qb) + rb"()[^\n]*").findall(LOWER_BLOB, pos))
+    LAST_SEARCH["query"] = query
+    LAST_SEARCH["result"] = (matches, count)
+    LAST_SEARCH["indices"] = indices
+    return matches, count
+
+
+# Typewriter pacing: characters revealed per SSE frame and delay per character
+TYPEWRITER_CHUNK = 6
+TYPEWRITER_CHAR_DELAY = 0.015
+
+TYPEWRITER_CONTENT = """
 ╔═══════════════════════════════════════════════════════════════════════╗
 ║                                                                       ║
 ║   ██████╗  █████╗ ████████╗ █████╗ ███████╗████████╗ █████╗ ██████╗   ║
@@ -89,119 +195,286 @@ async def stream_typewriter():
 
                       ✨ Typewriter effect complete! ✨
 """
-        accumulated = ""
-        for char in content:
-            accumulated += char
-            yield SSE.patch_signals({"content": accumulated})
-            await asyncio.sleep(0.015)  # 15ms for faster typing
+TYPEWRITER_LENGTH = len(TYPEWRITER_CONTENT)
+
+
+@lru_cache(maxsize=64)
+def typewriter_frames(chunk: int) -> tuple[bytes, ...]:
+    """Encoded SSE frames for a chunk size, built once and shared by every connection"""
+    total = TYPEWRITER_LENGTH
+    frames = [patch_signals({"fullText": TYPEWRITER_CONTENT})]
+    frames += [patch_signals({"pos": min(pos, total)}) for pos in range(chunk, total + chunk, chunk)]
+    return tuple(frames)
+
+
+# Stock symbols and names
+STOCK_NAMES = {
+    "AAPL": "Apple Inc.",
+    "GOOGL": "Alphabet Inc.",
+    "MSFT": "Microsoft Corp.",
+    "TSLA": "Tesla Inc.",
+    "AMZN": "Amazon.com Inc.",
+}
+
+# Name/symbol signals never change, so they ride along only on a client's first frame
+TICKER_STATIC = {sym: {"symbol": sym, "name": name} for sym, name in STOCK_NAMES.items()}
+
+# Fixed polling order, so each poll result lines up with its symbol by position
+SYMBOLS = tuple(STOCK_NAMES)
+
+# Ticker objects reused across polls, keeping one session and cookie/crumb per symbol
+TICKERS = yf.Tickers(" ".join(SYMBOLS))
+
+
+# Latest quotes shared by every /stream-ticker client, refreshed by a single poller task
+PRICE_STATE = {"quotes": {}, "display": {}, "changed": set(), "ts": 0, "sent": {}}
+PRICES_READY = asyncio.Event()
+price_poller: asyncio.Task | None = None
+
+# One single-slot queue per connected client; a slow client only ever holds the latest frame
+TICKER_SUBSCRIBERS: set[asyncio.Queue] = set()
+TICKER_KEEPALIVE = 15.0  # Seconds of silence before an SSE comment ping
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+def format_quote(price: float, prev_close: float) -> tuple[str, str, str]:
+    """Display strings for a quote: (price, daily change %, direction)"""
+    # Change % based on previous close (daily market change)
+    change_pct = ((price - prev_close) / prev_close) * 100 if prev_close else 0
+    # Direction for colors based on daily change
+    daily_dir = "up" if change_pct > 0 else "down" if change_pct < 0 else ""
+    return f"${price:.2f}", f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%", daily_dir
+
+
+def fetch_quote(sym: str) -> tuple[float, float]:
+    """Blocking Yahoo Finance lookup returning (price, previous close)"""
+    ticker = TICKERS.tickers[sym]
+    # One light chart request instead of the full quoteSummary scrape behind .info
+    bars = ticker.history(period="1d", interval="1m")
+    price = float(bars["Close"].iloc[-1]) if not bars.empty else 0
+    # The chart response already carries the previous close, so no second request
+    prev_close = ticker.get_history_metadata().get("chartPreviousClose", price)
+    return price, prev_close
+
+
+async def poll_prices():
+    """Refresh PRICE_STATE every 5 seconds, whatever the number of subscribers"""
+    quotes = PRICE_STATE["quotes"]
+    display = PRICE_STATE["display"]
+
+    while True:
+        try:
+            # Fetch real prices from Yahoo Finance, all symbols at once off the event loop
+            results = await asyncio.gather(*(asyncio.to_thread(fetch_quote, sym) for sym in SYMBOLS))
+            changed = set()
+            for sym, (price, prev_close) in zip(SYMBOLS, results):
+                if price:
+                    if sym in quotes and quotes[sym][0] != price:
+                        changed.add(sym)
+                    quotes[sym] = (price, prev_close)
+                    # Format once per poll, not once per subscriber per push
+                    display[sym] = format_quote(price, prev_close)
+            PRICE_STATE["changed"] = changed
+            PRICE_STATE["ts"] = int(time.time() * 1000)
+            PRICES_READY.set()
+
+            # Later frames are identical for every client, so encode once and fan out;
+            # a poll where nothing moved sends nothing (keepalives hold the stream open)
+            signals = ticker_signals(first=False)
+            delta = ticker_delta(signals)
+            PRICE_STATE["sent"] = signals
+            if delta:
+                frame = patch_signals(delta)
+                full_frame = None
+                for queue in TICKER_SUBSCRIBERS:
+                    if queue.full():
+                        # Dropping an unsent delta would lose its fields, so catch up with everything
+                        queue.get_nowait()
+                        full_frame = full_frame or patch_signals(signals)
+                        queue.put_nowait(full_frame)
+                    else:
+                        queue.put_nowait(frame)
+        except Exception as e:
+            print(f"Error fetching prices: {e}")
+
+        await asyncio.sleep(5.0)  # Poll every 5 seconds (be nice to Yahoo)
+
+
+def ticker_signals(first: bool) -> dict:
+    """Ticker signals for the latest poll; first frames also carry the static fields"""
+    # Flash only on poll-to-poll change, never on a client's first frame
+    changed = set() if first else PRICE_STATE["changed"]
+    ts = PRICE_STATE["ts"]
+    signals = {}
+
+    # Nested per-symbol signals: one short key per field instead of a prefixed key each
+    for sym, (price_str, change_str, daily_dir) in PRICE_STATE["display"].items():
+        quote = {
+            "price": price_str,
+            "change": change_str,
+            "dir": daily_dir,  # For color
+            "ts": ts if sym in changed else 0,  # Only flash on actual change
+        }
+        if first:
+            quote.update(TICKER_STATIC[sym])
+        signals[sym] = quote
+    return signals
+
+
+def ticker_delta(signals: dict) -> dict:
+    """Only the per-symbol fields that differ from the last pushed frame"""
+    sent = PRICE_STATE["sent"]
+    delta = {}
+    for sym, quote in signals.items():
+        prev = sent.get(sym, {})
+        fields = {k: v for k, v in quote.items() if prev.get(k) != v}
+        if fields:
+            delta[sym] = fields  # Datastar merges nested signals, so untouched fields keep their values
+    return delta
+
+
+def start_price_poller():
+    """Start the shared poller on first use (or restart it if it died)"""
+    global price_poller
+    if price_poller is None or price_poller.done():
+        price_poller = asyncio.create_task(poll_prices())
+
+
+@app.get("/", response_class=HTMLResponse)
+async def index():
+    """Serve the progressive loading demo"""
+    return HTMLResponse(render_page("index.html"))
+
+
+@app.get("/typewriter", response_class=HTMLResponse)
+async def typewriter_page():
+    """Serve the typewriter demo"""
+    return HTMLResponse(render_page("typewriter.html"))
+
+
+@app.get("/load/{stage}")
+async def load_stage(stage: str):
+    """SSE endpoint to load a stage fragment with slight delay for visual effect"""
+    async def generate():
+        await asyncio.sleep(0.3)  # Slight delay for unpacking effect
+        for frame in stage_frames(stage):
+            yield frame
+
+    return DatastarResponse(generate())
+
+
+@app.get("/stream-typewriter")
+async def stream_typewriter(chunk: int = Query(TYPEWRITER_CHUNK, ge=1, le=64)):
+    """Stream content a few characters per frame like a typewriter"""
+    async def generate():
+        # Send full text once, then advance the visible prefix `chunk` characters per frame
+        frames = typewriter_frames(chunk)
+        yield frames[0]
+        delay = TYPEWRITER_CHAR_DELAY * chunk
+        # Sleep toward fixed deadlines so send time and timer jitter don't add up over the banner
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        for frame in frames[1:]:
+            yield frame
+            deadline += delay
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
 
     return DatastarResponse(generate())
 
 
 @app.get("/ticker", response_class=HTMLResponse)
-async def ticker_page(request: Request):
+async def ticker_page():
     """Serve the stock ticker demo"""
-    return templates.TemplateResponse("ticker.html", {"request": request})
+    return HTMLResponse(render_page("ticker.html"))
 
 
 @app.get("/stream-ticker")
 async def stream_ticker():
-    """Stream real stock prices from Yahoo Finance"""
-    import time
-    async def generate():
-        symbols = list(STOCK_NAMES.keys())
-        prev_prices = {}
+    """Stream real stock prices from the shared Yahoo Finance poller"""
+    start_price_poller()
 
-        while True:
-            signals = {}
-            ts = int(time.time() * 1000)
-
-            try:
-                # Fetch real prices from Yahoo Finance
-                tickers = yf.Tickers(" ".join(symbols))
-                for sym in symbols:
-                    info = tickers.tickers[sym].info
-                    price = info.get("regularMarketPrice", 0) or info.get("currentPrice", 0)
-                    prev_close = info.get("regularMarketPreviousClose", price)
-
-                    if price:
-                        # Change % based on previous close (daily market change)
-                        change_pct = ((price - prev_close) / prev_close) * 100 if prev_close else 0
-                        # Direction for colors based on daily change
-                        daily_dir = "up" if change_pct > 0 else "down" if change_pct < 0 else ""
-                        # Flash only on fetch-to-fetch change
-                        old_price = prev_prices.get(sym, price)
-                        flash = price != old_price
-                        prev_prices[sym] = price
-
-                        signals[f"{sym}_symbol"] = sym
-                        signals[f"{sym}_name"] = STOCK_NAMES[sym]
-                        signals[f"{sym}_price"] = f"${price:.2f}"
-                        signals[f"{sym}_change"] = f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%"
-                        signals[f"{sym}_dir"] = daily_dir  # For color
-                        signals[f"{sym}_ts"] = ts if flash else 0  # Only flash on actual change
-
-                yield SSE.patch_signals(signals)
-            except Exception as e:
-                print(f"Error fetching prices: {e}")
-
-            await asyncio.sleep(5.0)  # Poll every 5 seconds (be nice to Yahoo)
+    async def generate():
+        await PRICES_READY.wait()  # Don't send an empty frame before the first poll lands
+        queue = asyncio.Queue(maxsize=1)
+        TICKER_SUBSCRIBERS.add(queue)
+        try:
+            yield patch_signals(ticker_signals(first=True))
+            while True:
+                # Woken by the poller instead of re-checking on a timer; ping when idle
+                try:
+                    frame = await asyncio.wait_for(queue.get(), TICKER_KEEPALIVE)
+                except TimeoutError:
+                    frame = KEEPALIVE_FRAME
+                yield frame
+        finally:
+            # Starlette cancels the generator on disconnect, which lands here
+            TICKER_SUBSCRIBERS.discard(queue)
 
     return DatastarResponse(generate())
 
 
 @app.get("/search", response_class=HTMLResponse)
-async def search_page(request: Request):
+async def search_page():
     """Serve the live search demo"""
-    return templates.TemplateResponse("search.html", {"request": request})
+    return HTMLResponse(render_page("search.html"))
 
 
 @app.get("/search-words")
 async def search_words(request: Request):
     """Search dictionary and stream results as HTML"""
     # DataStar sends signals in 'datastar' JSON param
-    import json
     datastar_param = request.query_params.get("datastar", "{}")
-    signals = json.loads(datastar_param)
+    signals = orjson.loads(datastar_param)
     q = signals.get("$q", "") or signals.get("q", "")
 
     async def generate():
         if len(q) < 2:
             html = '<div id="results"><p style="color:#666">Type at least 2 characters...</p></div>'
             yield SSE.patch_elements(html)
-            yield SSE.patch_signals({"count": 0})
+            yield patch_signals({"count": 0})
             return
 
         # Case-insensitive search
         query = q.lower()
-        all_matches = [w for w in WORDS if query in w.lower()]
-        matches = all_matches[:100]
-
-        # Build results HTML with query highlighted
-        items = []
-        for word in matches:
-            # Highlight matching part
-            idx = word.lower().find(query)
-            if idx >= 0:
-                highlighted = f"{word[:idx]}<mark>{word[idx:idx+len(query)]}</mark>{word[idx+len(query):]}"
-            else:
-                highlighted = word
-            items.append(f'<li>{highlighted} <span class="def-btn" data-on:click="@get(\'/define/{word}\')" title="Get definition">?</span></li>')
-
-        html = f'<div id="results"><ul>{"".join(items)}</ul></div>'
-        yield SSE.patch_elements(html)
-        yield SSE.patch_signals({"count": len(all_matches)})
+        matches, total = find_matches(query, 100)
+
+        # Build results HTML with query highlighted; the scan already located each match
+        n = len(query)
+        items = "".join(
+            f'<li>{word[:idx]}<mark>{word[idx:idx+n]}</mark>{word[idx+n:]} <span class="def-btn" data-on:click="@get(\'/define/{word}\')" title="Get definition">?</span></li>'
+            for word, idx in matches
+        )
+
+        # Items never contain a newline, so the frame is a single data line around them
+        yield RESULTS_FRAME_PREFIX + items.encode() + RESULTS_FRAME_SUFFIX
+        yield patch_signals({"count": total})
 
     return DatastarResponse(generate())
 
 
+# Shared client so definition lookups reuse pooled keep-alive connections
+http_client = httpx.AsyncClient(timeout=5.0, limits=httpx.Limits(max_connections=50, max_keepalive_connections=20))
+
+# Dictionary definitions never change; remember recent ones so repeat clicks skip the API
+DEFINITION_CACHE: dict[str, str] = {}
+DEFINITION_CACHE_SIZE = 1024
+
+
+def cache_definition(word: str, definition: str):
+    """Remember a definition, evicting the oldest entry once the cache is full"""
+    if len(DEFINITION_CACHE) >= DEFINITION_CACHE_SIZE:
+        del DEFINITION_CACHE[next(iter(DEFINITION_CACHE))]
+    DEFINITION_CACHE[word] = definition
+
+
 @app.get("/define/{word}")
 async def define_word(word: str):
     """Fetch word definition from free dictionary API"""
     async def generate():
-        async with httpx.AsyncClient() as client:
+        definition = DEFINITION_CACHE.get(word)
+        if definition is None:
             try:
-                resp = await client.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}", timeout=5.0)
+                resp = await http_client.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}")
                 if resp.status_code == 200:
                     data = resp.json()
                     meanings = data[0].get("meanings", [])
@@ -213,6 +486,8 @@ async def define_word(word: str):
                     definition = "<br>".join(defs) if defs else "No definition found"
                 else:
                     definition = "Definition not found in dictionary"
+                if resp.status_code in (200, 404):  # Server hiccups and network failures aren't cached
+                    cache_definition(word, definition)
             except Exception:
                 definition = "Could not fetch definition"
 
@@ -232,4 +507,27 @@ async def clear_definition():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001, reload=True)
+    # Owned by the process that starts uvicorn, so workers can't remove it while others still serve;
+    # with WORKERS > 1 this is the supervisor, and benchmark.py sums its worker children
+    with open(PID_FILE, "w") as f:
+        f.write(str(os.getpid()))
+    try:
+        if DEV:
+            # Reload needs an import string and spawns a file watcher, so keep it to DEV
+            uvicorn.run("main:app", host="0.0.0.0", port=PORT, reload=True)
+        else:
+            uvicorn.run(
+                # Worker processes import the app themselves, which needs an import string
+                "main:app" if WORKERS > 1 else app,
+                host="0.0.0.0",
+                port=PORT,
+                workers=WORKERS,
+                access_log=False,
+                # Prefer uvloop/httptools when uvicorn[standard] is installed, without requiring them
+                loop="auto",
+                http="auto",
+                log_level="warning",
+            )
+    finally:
+        if os.path.exists(PID_FILE):
+            os.remove(PID_FILE)
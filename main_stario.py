@@ -4,21 +4,32 @@ DataStar Progressive Loading Demos - Stario 2.0 Version
 Run with: uv run python main_stario.py
 """
 import asyncio
+import hashlib
 import json
+import mmap
+import orjson
+import os
 import re
 import time
 import uuid
 import zipfile
 import io
 import xml.etree.ElementTree as ET
+from array import array
+from collections import OrderedDict
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
 
 import httpx
 import yfinance as yf
 from bs4 import BeautifulSoup
 from jinja2 import Environment, FileSystemLoader
-from stario import Context, RichTracer, Stario, Writer
+from stario import Context, JsonTracer, RichTracer, Stario, Writer
+from stario.datastar import sse
 from stario.html import SafeString
+from stario.telemetry import Span
 
 # =============================================================================
 # Constants
@@ -29,12 +40,16 @@ MIN_WPM = 50
 MAX_WPM = 2000
 WPM_STEP = 50
 SECONDS_PER_MINUTE = 60.0
+PROGRESS_STEPS = 200  # RSVP progress is pushed when it crosses one of these steps (0.5%), not every word
 
 STAGE_LOAD_DELAY = 0.3
 TYPEWRITER_CHAR_DELAY = 0.015
+TYPEWRITER_CHUNK = 6  # Characters revealed per SSE frame
 TICKER_POLL_SECONDS = 5.0
+TICKER_KEEPALIVE_SECONDS = 15.0
 API_TIMEOUT_SECONDS = 5.0
 URL_IMPORT_TIMEOUT_SECONDS = 15.0
+URL_IMPORT_MAX_BYTES = 2 * 1024 * 1024  # Article text sits well inside this; stop reading past it
 
 MIN_WORDS_TO_SAVE = 5
 MIN_EPUB_WORDS = 10
@@ -43,19 +58,35 @@ MIN_PARAGRAPH_LENGTH = 50
 PREVIEW_LENGTH = 200
 MAX_TITLE_LENGTH = 100
 TEXT_ID_LENGTH = 8
+LIBRARY_SAVE_DELAY_SECONDS = 0.5  # Saves requested within this window share one write
 
 SEARCH_MIN_CHARS = 2
 SEARCH_MAX_RESULTS = 100
+DEFINITION_CACHE_SIZE = 1024
+RSVP_SESSION_COOKIE = "rsvp_session"
+MAX_RSVP_SESSIONS = 256  # Readers remembered at once; the least recently used one makes room
+EPUB_CACHE_SIZE = 4  # Parsed books kept for re-uploads; each holds a full word list
+
+# Set DEV=1 for per-request console tracing while working on the app
+DEV = os.environ.get("DEV") == "1"
 
 SERVER_HOST = "127.0.0.1"
 SERVER_PORT = 8001
+PID_FILE = Path("/tmp/datastar-stario.pid")
 
 # ORP (Optimal Recognition Point) word-length thresholds
 ORP_THRESHOLDS = [(1, 0), (5, 1), (9, 2), (13, 3)]
 ORP_DEFAULT = 4
+# ORP index by word length up to the last threshold, so lookups skip the threshold scan
+ORP_TABLE = tuple(
+    next((orp for max_len, orp in ORP_THRESHOLDS if length <= max_len), ORP_DEFAULT)
+    for length in range(ORP_THRESHOLDS[-1][0] + 1)
+)
 
 ERROR_PREVIEW_LENGTH = 50
 
+HTML_PARSER = "lxml"  # C parser for EPUB chapters and imported pages; "html.parser" is pure Python
+
 STOCK_NAMES = {
     "AAPL": "Apple Inc.",
     "GOOGL": "Alphabet Inc.",
@@ -64,6 +95,15 @@ STOCK_NAMES = {
     "AMZN": "Amazon.com Inc.",
 }
 
+# Name/symbol signals never change, so they ride along only on a client's first frame
+TICKER_STATIC = {sym: {"symbol": sym, "name": name} for sym, name in STOCK_NAMES.items()}
+
+# Fixed polling order, so each poll result lines up with its symbol by position
+SYMBOLS = tuple(STOCK_NAMES)
+
+# Ticker objects reused across polls, keeping one session and cookie/crumb per symbol
+TICKERS = yf.Tickers(" ".join(SYMBOLS))
+
 ARTICLE_SELECTORS = [
     "article", "main", '[role="main"]',
     ".post-content", ".article-content", ".entry-content", "#content",
@@ -71,16 +111,132 @@ ARTICLE_SELECTORS = [
 
 NOISE_TAGS = ["script", "style", "nav", "header", "footer", "aside", "form", "iframe", "noscript"]
 
+# Namespaced OPF tags read from an EPUB package document
+OPF_TITLE_TAG = "{http://purl.org/dc/elements/1.1/}title"
+OPF_ITEM_TAG = "{http://www.idpf.org/2007/opf}item"
+OPF_ITEMREF_TAG = "{http://www.idpf.org/2007/opf}itemref"
+
 # =============================================================================
 # Setup
 # =============================================================================
 
-templates = Environment(loader=FileSystemLoader("templates"))
+# Outside DEV templates never change on disk, so skip the per-lookup mtime check
+templates = Environment(loader=FileSystemLoader("templates"), auto_reload=DEV)
+
+
+class QuietTracer:
+    """Tracer that skips successful spans, so only failures pay for formatting and console IO."""
+
+    __slots__ = ("_errors",)
+
+    def __init__(self) -> None:
+        self._errors = JsonTracer()  # Failed spans still go out as JSON lines
+
+    def __enter__(self) -> "QuietTracer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._errors.__exit__(exc_type, exc_val, exc_tb)
+
+    def __call__(self, name: str, attributes: dict | None = None) -> Span:
+        return Span(self, name, attributes)
 
-with open("/usr/share/dict/words") as f:
-    WORDS = [w.strip() for w in f.readlines()]
+    def notify(self, span: Span) -> None:
+        # Stario reports handler exceptions only through the tracer, so errors and 500s must get through
+        if span.finished and (span.error or (span.get("response.status_code") or 0) >= 500):
+            self._errors.notify(span)
+
+
+with open("/usr/share/dict/words", "rb") as f:
+    # Dictionary stays memory-mapped; only the words actually shown get decoded into str
+    DICT = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+_raw = DICT[:-1] if DICT[-1:] == b"\n" else DICT[:]
+# Start of each line in DICT, plus a sentinel one past the end
+DICT_OFFSETS = array("I", accumulate((len(line) + 1 for line in _raw.split(b"\n")), initial=0))
+
+# Lowercased dictionary as one newline-joined blob, so search is a C-level bytes.find loop
+LOWER_BLOB = _raw.decode().lower().encode()
+WORD_OFFSETS = array("I", accumulate((len(line) + 1 for line in LOWER_BLOB.split(b"\n")), initial=0))
+if WORD_OFFSETS == DICT_OFFSETS:
+    WORD_OFFSETS = DICT_OFFSETS  # Lowercasing kept every word's byte length; share one table
+del _raw
+
+TYPEWRITER_CONTENT = """
+╔═══════════════════════════════════════════════════════════════════════╗
+║                                                                       ║
+║   ██████╗  █████╗ ████████╗ █████╗ ███████╗████████╗ █████╗ ██████╗   ║
+║   ██╔══██╗██╔══██╗╚══██╔══╝██╔══██╗██╔════╝╚══██╔══╝██╔══██╗██╔══██╗  ║
+║   ██║  ██║███████║   ██║   ███████║███████╗   ██║   ███████║██████╔╝  ║
+║   ██║  ██║██╔══██║   ██║   ██╔══██║╚════██║   ██║   ██╔══██║██╔══██╗  ║
+║   ██████╔╝██║  ██║   ██║   ██║  ██║███████║   ██║   ██║  ██║██║  ██║  ║
+║   ╚═════╝ ╚═╝  ╚═╝   ╚═╝   ╚═╝  ╚═╝╚══════╝   ╚═╝   ╚═╝  ╚═╝╚═╝  ╚═╝  ║
+║                                                                       ║
+║                     The Hypermedia Framework                          ║
+║                                                                       ║
+╠═══════════════════════════════════════════════════════════════════════╣
+║                                                                       ║
+║  > Initializing SSE connection...                                     ║
+║  > Loading reactive signals...                                        ║
+║  > Streaming content character by character...                        ║
+║                                                                       ║
+║  This entire page is being "typed" via Server-Sent Events.            ║
+║  Each character arrives as a separate SSE signal update.              ║
+║                                                                       ║
+║  Features demonstrated:                                               ║
+║    • Real-time signal streaming                                       ║
+║    • Character-by-character accumulation                              ║
+║    • DataStar's reactive data-text binding                            ║
+║    • Zero JavaScript required (just HTML + attributes)                ║
+║                                                                       ║
+╠═══════════════════════════════════════════════════════════════════════╣
+║                                                                       ║
+║  "Any sufficiently advanced technology is                             ║
+║   indistinguishable from magic."                                      ║
+║                                    — Arthur C. Clarke                 ║
+║                                                                       ║
+╚═══════════════════════════════════════════════════════════════════════╝
+
+                      ✨ Typewriter effect complete! ✨
+"""
+TYPEWRITER_LENGTH = len(TYPEWRITER_CONTENT)
+
+# Position-update SSE frames, encoded once instead of on every connection
+TYPEWRITER_FRAMES = tuple(
+    sse.signals({"pos": min(pos, TYPEWRITER_LENGTH)})
+    for pos in range(TYPEWRITER_CHUNK, TYPEWRITER_LENGTH + TYPEWRITER_CHUNK, TYPEWRITER_CHUNK)
+)
 
 RSVP_LIBRARY_FILE = Path("rsvp_library.json")
+RSVP_WORDS_DIR = Path("rsvp")  # <text_id>.words blob + <text_id>.idx offsets per saved text
+library_dirty = asyncio.Event()
+library_saver: asyncio.Task | None = None
+# Deleted texts whose words files wait for the index write that stops listing them
+words_to_delete: set[str] = set()
+
+# Shared client so definition lookups reuse pooled keep-alive connections
+http_client = httpx.AsyncClient(
+    timeout=API_TIMEOUT_SECONDS,
+    limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+)
+
+# Most recent search, its result and matched word indices: served again if the same query
+# repeats, and narrowed instead of rescanned when the next keystroke extends it
+last_search: dict = {"query": None, "result": None, "indices": []}
+
+# Dictionary definitions never change; remember recent ones so repeat clicks skip the API
+definition_cache: dict[str, str] = {}
+
+# Parsed EPUBs by content digest, so re-importing the same file skips the parse; least recently used first
+epub_cache: OrderedDict[bytes, tuple[str, list[str]]] = OrderedDict()
+
+# Latest quotes shared by every /stream-ticker client, refreshed by a single poller task
+price_state: dict = {"quotes": {}, "display": {}, "changed": set(), "ts": 0, "sent": {}}
+prices_ready = asyncio.Event()
+price_poller: asyncio.Task | None = None
+
+# One single-slot queue per connected client; a slow client only ever holds the latest frame
+ticker_subscribers: set[asyncio.Queue] = set()
+KEEPALIVE_FRAME = b": keepalive\n\n"
 
 
 # =============================================================================
@@ -92,30 +248,163 @@ def load_rsvp_library() -> dict:
     """Load library of texts with per-text state."""
     try:
         if RSVP_LIBRARY_FILE.exists():
-            with open(RSVP_LIBRARY_FILE) as f:
-                return json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
+            return orjson.loads(RSVP_LIBRARY_FILE.read_bytes())
+    except (orjson.JSONDecodeError, OSError) as e:
         print(f"Warning: Could not load library: {e}")
     return {}
 
 
-def save_rsvp_library() -> None:
-    """Persist library to JSON file."""
+class WordsFile:
+    """A saved text's words, memory-mapped and decoded one at a time as the reader advances."""
+
+    __slots__ = ("_map", "_offsets")
+
+    def __init__(self, text_id: str) -> None:
+        path = RSVP_WORDS_DIR / f"{text_id}.words"
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = array("I")
+        self._offsets.frombytes(path.with_suffix(".idx").read_bytes())
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        # Each word runs up to the newline before the next word's offset
+        return self._map[self._offsets[i]:self._offsets[i + 1] - 1].decode()
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def replace_file(path: Path, data: bytes) -> None:
+    """Write a file via a temp file, so a crash leaves either the old contents or the new."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def write_words(text_id: str, words) -> int:
+    """Store a text's words as a newline-joined blob plus its offsets, returning the word count."""
+    RSVP_WORDS_DIR.mkdir(exist_ok=True)
+    encoded = [word.encode() for word in words]
+    path = RSVP_WORDS_DIR / f"{text_id}.words"
+    replace_file(path, b"\n".join(encoded))
+    offsets = array("I", accumulate((len(word) + 1 for word in encoded), initial=0))
+    replace_file(path.with_suffix(".idx"), offsets.tobytes())
+    return len(encoded)
+
+
+def load_words(text_id: str) -> WordsFile | list[str]:
+    """Open a saved text's words; an empty text has no file to map."""
+    if not rsvp_library[text_id].get("word_count"):
+        return []
+    return WordsFile(text_id)
+
+
+def delete_words(text_id: str) -> None:
+    """Remove a text's words files."""
+    path = RSVP_WORDS_DIR / f"{text_id}.words"
+    path.unlink(missing_ok=True)
+    path.with_suffix(".idx").unlink(missing_ok=True)
+
+
+def migrate_rsvp_library() -> None:
+    """Move words (or raw text) still stored inline in the JSON out to words files."""
+    legacy = [text_id for text_id, entry in rsvp_library.items() if "word_count" not in entry]
+    for text_id in legacy:
+        entry = rsvp_library[text_id]
+        words = entry.pop("words", None) or split_into_words(entry.pop("text", ""))
+        entry.pop("text", None)
+        entry["word_count"] = write_words(text_id, words)
+    if legacy:
+        write_rsvp_library(library_json())
+
+
+def library_json() -> bytes:
+    """The library index as JSON; entries hold only metadata, so this stays small."""
+    return orjson.dumps(rsvp_library, option=orjson.OPT_INDENT_2)
+
+
+def write_rsvp_library(data: bytes, deleted=()) -> bool:
+    """Persist library JSON via a temp file, then remove the words files of the texts it dropped."""
     try:
-        with open(RSVP_LIBRARY_FILE, "w") as f:
-            json.dump(rsvp_library, f, indent=2)
+        replace_file(RSVP_LIBRARY_FILE, data)
     except OSError as e:
         print(f"Warning: Could not save library: {e}")
+        return False
+    # Only once the index on disk no longer lists them, so a crash never leaves entries without files
+    for text_id in deleted:
+        delete_words(text_id)
+    return True
+
+
+async def flush_rsvp_library() -> None:
+    """Write the library once per burst of save requests."""
+    while True:
+        await library_dirty.wait()
+        await asyncio.sleep(LIBRARY_SAVE_DELAY_SECONDS)
+        library_dirty.clear()  # Cleared before writing so a save during the write isn't lost
+        # Snapshot on the loop, where handlers mutate the library; only the disk I/O moves off it
+        deleted = tuple(words_to_delete)
+        words_to_delete.clear()
+        if not await asyncio.to_thread(write_rsvp_library, library_json(), deleted):
+            words_to_delete.update(deleted)  # Still listed on disk; remove them after the next write
+
+
+def save_rsvp_library() -> None:
+    """Schedule a library write, starting the background flusher on first use."""
+    global library_saver, library_items_cache
+    library_items_cache = None  # Every library change comes through here; rebuild the view next time
+    if library_saver is None or library_saver.done():
+        library_saver = asyncio.create_task(flush_rsvp_library())
+    library_dirty.set()
 
 
 rsvp_library = load_rsvp_library()
-rsvp_state: dict = {
-    "text_id": None,
-    "words": [],
-    "position": 0,
-    "wpm": DEFAULT_WPM,
-    "running": False,
-}
+library_items_cache: list[dict] | None = None  # Sorted UI view of rsvp_library
+
+
+class ReaderState:
+    """One browser's RSVP reader; slotted so the per-word loop reads plain attributes."""
+
+    __slots__ = ("text_id", "words", "position", "wpm", "delay", "running", "pending_title", "text_key", "stopped", "idle")
+
+    def __init__(self) -> None:
+        self.text_id: str | None = None
+        self.words: WordsFile | list[str] = []
+        self.position = 0
+        self.wpm = DEFAULT_WPM
+        self.delay = SECONDS_PER_MINUTE / DEFAULT_WPM  # Seconds per word, kept in step by set_reader_wpm()
+        self.running = False
+        self.pending_title: str | None = None  # Title of imported text that isn't saved yet
+        self.text_key: tuple[int, int] | None = None  # (length, hash) of the pasted text behind text_id
+        self.stopped = asyncio.Event()  # Set by stop_reader() to wake a running reader mid-wait
+        self.idle = asyncio.Event()  # Clear while an rsvp_start loop is playing this reader
+        self.idle.set()
+
+
+# Reader state per browser, keyed by the session cookie we issued; least recently used first
+rsvp_sessions: OrderedDict[str, ReaderState] = OrderedDict()
+
+
+def reader_state(c: Context, w: Writer) -> ReaderState:
+    """This browser's reader state; a missing or unknown cookie gets a freshly issued session."""
+    session_id = c.req.cookies.get(RSVP_SESSION_COOKIE)
+    state = rsvp_sessions.get(session_id) if session_id else None
+    if state is not None:
+        rsvp_sessions.move_to_end(session_id)
+        return state
+
+    # Only ids made here are ever stored, so a client can't pick its own or share the cookieless one
+    if len(rsvp_sessions) >= MAX_RSVP_SESSIONS:
+        # Prefer the least recently used idle reader; if all are reading, stop the least recent one
+        evict = next((sid for sid, other in rsvp_sessions.items() if not other.running), None)
+        stop_reader(rsvp_sessions.pop(evict) if evict else rsvp_sessions.popitem(last=False)[1])
+    session_id = uuid.uuid4().hex
+    w.cookie(RSVP_SESSION_COOKIE, session_id, httponly=True)
+    state = rsvp_sessions[session_id] = ReaderState()
+    return state
 
 
 # =============================================================================
@@ -123,31 +412,53 @@ rsvp_state: dict = {
 # =============================================================================
 
 
+def stop_reader(rsvp_state: ReaderState) -> None:
+    """Stop a running reader right away instead of after its current word's delay."""
+    rsvp_state.running = False
+    rsvp_state.stopped.set()
+
+
+def set_reader_wpm(rsvp_state: ReaderState, wpm: int) -> None:
+    """Set the reading speed along with its per-word delay."""
+    rsvp_state.wpm = wpm
+    rsvp_state.delay = SECONDS_PER_MINUTE / wpm
+
+
 def calculate_orp(word: str) -> int:
     """Calculate Optimal Recognition Point for a word."""
     length = len(word)
-    for max_len, orp in ORP_THRESHOLDS:
-        if length <= max_len:
-            return orp
-    return ORP_DEFAULT
+    return ORP_TABLE[length] if length < len(ORP_TABLE) else ORP_DEFAULT
 
 
-def get_word_parts(word: str) -> dict:
-    """Split word into before, orp (red letter), and after parts."""
+@lru_cache(maxsize=8192)
+def get_word_parts(word: str) -> tuple[str, str, str]:
+    """Split word into (before, orp (red letter), after)."""
     if not word:
-        return {"before": "", "orp": "", "after": "", "word": ""}
+        return "", "", ""
     orp_idx = calculate_orp(word)
-    return {
-        "before": word[:orp_idx],
-        "orp": word[orp_idx] if orp_idx < len(word) else "",
-        "after": word[orp_idx + 1:] if orp_idx + 1 < len(word) else "",
-        "word": word,
-    }
+    return (
+        word[:orp_idx],
+        word[orp_idx] if orp_idx < len(word) else "",
+        word[orp_idx + 1:] if orp_idx + 1 < len(word) else "",
+    )
 
 
 def split_into_words(text: str) -> list[str]:
     """Split text into non-empty words."""
-    return [w for w in re.split(r'\s+', text.strip()) if w]
+    return text.split()  # Splits on any whitespace run and never yields empty strings
+
+
+def text_preview(words: list[str]) -> str:
+    """The first PREVIEW_LENGTH characters of a text, with an ellipsis if it runs on."""
+    # Every word is at least one character, so this many words always covers the preview
+    text = " ".join(words[:PREVIEW_LENGTH])
+    return text[:PREVIEW_LENGTH] + "..." if len(text) > PREVIEW_LENGTH else text
+
+
+def share_words(words: list[str]) -> list[str]:
+    """Point repeated words at one str object, so a long text holds each distinct word once."""
+    seen: dict[str, str] = {}
+    return [seen.setdefault(word, word) for word in words]
 
 
 def sig(signals: dict, key: str, default: str = "") -> str:
@@ -155,18 +466,110 @@ def sig(signals: dict, key: str, default: str = "") -> str:
     return signals.get(f"${key}", signals.get(key, default))
 
 
+def word_at(i: int) -> str:
+    """Dictionary word i, sliced out of the mapped file."""
+    return DICT[DICT_OFFSETS[i]:DICT_OFFSETS[i + 1] - 1].decode().strip()
+
+
+def find_matches(query: str, limit: int) -> tuple[list[tuple[str, int]], int]:
+    """Words containing the lowercased query as (word, match index), plus the total count."""
+    if last_search["query"] == query:
+        return last_search["result"]  # Same query again (re-fired input, another visitor): no rescan
+    qb = query.encode()
+    matches = []
+    if b"\n" in qb:
+        return matches, 0
+    find = LOWER_BLOB.find
+    indices = []
+    previous = last_search["query"]
+    if previous is not None and previous in query and len(last_search["indices"]) == last_search["result"][1]:
+        # Typing onward from a query whose hits all fit under the limit: any word containing
+        # this query contains that one too, so only those few words need checking
+        for i in last_search["indices"]:
+            start = WORD_OFFSETS[i]
+            pos = find(qb, start, WORD_OFFSETS[i + 1])
+            if pos >= 0:
+                indices.append(i)
+                matches.append((word_at(i), len(LOWER_BLOB[start:pos].decode())))
+        count = len(matches)
+    else:
+        pos = find(qb)
+        while pos >= 0 and len(matches) < limit:
+            i = bisect_right(WORD_OFFSETS, pos) - 1
+            start = WORD_OFFSETS[i]
+            indices.append(i)
+            matches.append((word_at(i), len(LOWER_BLOB[start:pos].decode())))
+            # Resume at the next word so a word matching twice is only counted once
+            pos = find(qb, WORD_OFFSETS[i + 1])
+        count = len(matches)
+        if pos >= 0:
+            # Count the remaining words inside the regex engine: each match runs to the end
+            # of its line, and the empty group makes findall return shared b"" items
+            count += len(re.compile(re.escape(qb) + rb"()[^\n]*").findall(LOWER_BLOB, pos))
+    last_search["query"] = query
+    last_search["result"] = (matches, count)
+    last_search["indices"] = indices
+    return matches, count
+
+
+def cache_definition(word: str, definition: str) -> None:
+    """Remember a definition, evicting the oldest entry once the cache is full."""
+    if len(definition_cache) >= DEFINITION_CACHE_SIZE:
+        del definition_cache[next(iter(definition_cache))]
+    definition_cache[word] = definition
+
+
+def format_quote(price: float, prev_close: float) -> tuple[str, str, str]:
+    """Display strings for a quote: (price, daily change %, direction)."""
+    change_pct = ((price - prev_close) / prev_close) * 100 if prev_close else 0
+    daily_dir = "up" if change_pct > 0 else "down" if change_pct < 0 else ""
+    return f"${price:.2f}", f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%", daily_dir
+
+
+def fetch_quote(sym: str) -> tuple[float, float]:
+    """Blocking Yahoo Finance lookup returning (price, previous close)."""
+    ticker = TICKERS.tickers[sym]
+    # One light chart request instead of the full quoteSummary scrape behind .info
+    bars = ticker.history(period="1d", interval="1m")
+    price = float(bars["Close"].iloc[-1]) if not bars.empty else 0
+    # The chart response already carries the previous close, so no second request
+    prev_close = ticker.get_history_metadata().get("chartPreviousClose", price)
+    return price, prev_close
+
+
+@lru_cache(maxsize=64)
+def render_static(name: str) -> bytes:
+    """Render a template that takes no context once and reuse the bytes."""
+    return templates.get_template(name).render().encode()
+
+
+@lru_cache(maxsize=64)
+def render_stage(stage: str) -> str:
+    """Render a stage fragment once; fragments take no context either."""
+    return templates.get_template(f"stages/{stage}.html").render()
+
+
+if DEV:
+    # auto_reload only helps if rendering reaches Jinja, so edited templates skip these caches too
+    render_static = render_static.__wrapped__
+    render_stage = render_stage.__wrapped__
+
+
 def build_library_items() -> list[dict]:
-    """Build sorted library list for UI rendering."""
-    items = []
-    for text_id, entry in rsvp_library.items():
-        items.append({
-            "id": text_id,
-            "title": entry.get("title", "Untitled"),
-            "word_count": len(entry.get("words", [])),
-            "position": entry.get("position", 0),
-        })
-    items.sort(key=lambda x: x["title"].lower())
-    return items
+    """Build sorted library list for UI rendering, reusing it until the library changes."""
+    global library_items_cache
+    if library_items_cache is None:
+        items = []
+        for text_id, entry in rsvp_library.items():
+            items.append({
+                "id": text_id,
+                "title": entry.get("title", "Untitled"),
+                "word_count": entry.get("word_count", 0),
+                "position": entry.get("position", 0),
+            })
+        items.sort(key=lambda x: x["title"].lower())
+        library_items_cache = items
+    return library_items_cache
 
 
 # =============================================================================
@@ -176,45 +579,39 @@ def build_library_items() -> list[dict]:
 
 async def index(c: Context, w: Writer) -> None:
     """Serve the progressive loading demo."""
-    w.respond(templates.get_template("index.html").render().encode(), b"text/html; charset=utf-8")
+    w.respond(render_static("index.html"), b"text/html; charset=utf-8")
 
 
 async def typewriter_page(c: Context, w: Writer) -> None:
     """Serve the typewriter demo."""
-    w.respond(templates.get_template("typewriter.html").render().encode(), b"text/html; charset=utf-8")
+    w.respond(render_static("typewriter.html"), b"text/html; charset=utf-8")
 
 
 async def ticker_page(c: Context, w: Writer) -> None:
     """Serve the stock ticker demo."""
-    w.respond(templates.get_template("ticker.html").render().encode(), b"text/html; charset=utf-8")
+    w.respond(render_static("ticker.html"), b"text/html; charset=utf-8")
 
 
 async def search_page(c: Context, w: Writer) -> None:
     """Serve the live search demo."""
-    w.respond(templates.get_template("search.html").render().encode(), b"text/html; charset=utf-8")
+    w.respond(render_static("search.html"), b"text/html; charset=utf-8")
 
 
 async def rsvp_page(c: Context, w: Writer) -> None:
     """Serve the RSVP speed reader demo with library."""
-    library_items = []
-    for text_id, entry in rsvp_library.items():
-        library_items.append({
-            "id": text_id,
-            "title": entry.get("title", "Untitled"),
-            "word_count": len(entry.get("words", [])),
-            "position": entry.get("position", 0),
-            "wpm": entry.get("wpm", DEFAULT_WPM),
-        })
-    library_items.sort(key=lambda x: x["title"].lower())
+    library_items = build_library_items()
+
+    # First visit hands out the cookie that keeps this browser's reader apart from others
+    rsvp_state = reader_state(c, w)
 
     # Check if there's an active session with loaded text (from URL/EPUB import)
     active_session = None
-    if rsvp_state.get("words") and not rsvp_state.get("text_id"):
+    if rsvp_state.words and not rsvp_state.text_id:
         active_session = {
-            "title": rsvp_state.get("pending_title", "Imported Text"),
-            "total_words": len(rsvp_state["words"]),
-            "position": rsvp_state.get("position", 0),
-            "wpm": rsvp_state.get("wpm", DEFAULT_WPM),
+            "title": rsvp_state.pending_title or "Imported Text",
+            "total_words": len(rsvp_state.words),
+            "position": rsvp_state.position,
+            "wpm": rsvp_state.wpm,
         }
 
     w.respond(
@@ -235,94 +632,128 @@ async def load_stage(c: Context, w: Writer) -> None:
     """SSE endpoint to load a stage fragment with slight delay for visual effect."""
     stage = c.req.tail or "shell"
     await asyncio.sleep(STAGE_LOAD_DELAY)
-    stage_html = templates.get_template(f"stages/{stage}.html").render()
+    stage_html = render_stage(stage)
     w.patch(SafeString(stage_html))
     w.sync({"current_stage": stage})
 
 
 async def stream_typewriter(c: Context, w: Writer) -> None:
-    """Stream content character by character like a typewriter."""
-    content = """
-╔═══════════════════════════════════════════════════════════════════════╗
-║                                                                       ║
-║   ██████╗  █████╗ ████████╗ █████╗ ███████╗████████╗ █████╗ ██████╗   ║
-║   ██╔══██╗██╔══██╗╚══██╔══╝██╔══██╗██╔════╝╚══██╔══╝██╔══██╗██╔══██╗  ║
-║   ██║  ██║███████║   ██║   ███████║███████╗   ██║   ███████║██████╔╝  ║
-║   ██║  ██║██╔══██║   ██║   ██╔══██║╚════██║   ██║   ██╔══██║██╔══██╗  ║
-║   ██████╔╝██║  ██║   ██║   ██║  ██║███████║   ██║   ██║  ██║██║  ██║  ║
-║   ╚═════╝ ╚═╝  ╚═╝   ╚═╝   ╚═╝  ╚═╝╚══════╝   ╚═╝   ╚═╝  ╚═╝╚═╝  ╚═╝  ║
-║                                                                       ║
-║                     The Hypermedia Framework                          ║
-║                                                                       ║
-╠═══════════════════════════════════════════════════════════════════════╣
-║                                                                       ║
-║  > Initializing SSE connection...                                     ║
-║  > Loading reactive signals...                                        ║
-║  > Streaming content character by character...                        ║
-║                                                                       ║
-║  This entire page is being "typed" via Server-Sent Events.            ║
-║  Each character arrives as a separate SSE signal update.              ║
-║                                                                       ║
-║  Features demonstrated:                                               ║
-║    • Real-time signal streaming                                       ║
-║    • Character-by-character accumulation                              ║
-║    • DataStar's reactive data-text binding                            ║
-║    • Zero JavaScript required (just HTML + attributes)                ║
-║                                                                       ║
-╠═══════════════════════════════════════════════════════════════════════╣
-║                                                                       ║
-║  "Any sufficiently advanced technology is                             ║
-║   indistinguishable from magic."                                      ║
-║                                    — Arthur C. Clarke                 ║
-║                                                                       ║
-╚═══════════════════════════════════════════════════════════════════════╝
-
-                      ✨ Typewriter effect complete! ✨
-"""
-    # Send full text once, then stream position index (tiny payloads)
-    w.sync({"fullText": content})
-    for pos in range(1, len(content) + 1):
-        w.sync({"pos": pos})
-        await asyncio.sleep(TYPEWRITER_CHAR_DELAY)
-
-
-async def stream_ticker(c: Context, w: Writer) -> None:
-    """Stream real stock prices from Yahoo Finance."""
-    symbols = list(STOCK_NAMES.keys())
-    prev_prices: dict[str, float] = {}
+    """Stream content a few characters per frame like a typewriter."""
+    # Send full text once (which also starts the SSE response), then the pre-encoded positions
+    w.sync({"fullText": TYPEWRITER_CONTENT})
+    delay = TYPEWRITER_CHAR_DELAY * TYPEWRITER_CHUNK
+    # Sleep toward fixed deadlines so write time and timer jitter don't add up over the banner
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()
+    for frame in TYPEWRITER_FRAMES:
+        w.write(frame)
+        deadline += delay
+        await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+
+async def poll_prices() -> None:
+    """Refresh price_state on a fixed cadence, independent of subscriber count."""
+    quotes = price_state["quotes"]
+    display = price_state["display"]
 
     while True:
-        signals = {}
-        ts = int(time.time() * 1000)
-
         try:
-            tickers = yf.Tickers(" ".join(symbols))
-            for sym in symbols:
-                info = tickers.tickers[sym].info
-                price = info.get("regularMarketPrice", 0) or info.get("currentPrice", 0)
-                prev_close = info.get("regularMarketPreviousClose", price)
-
+            # Each lookup is a blocking HTTPS call: run them in parallel, off the event loop
+            results = await asyncio.gather(*(asyncio.to_thread(fetch_quote, sym) for sym in SYMBOLS))
+            changed = set()
+            for sym, (price, prev_close) in zip(SYMBOLS, results):
                 if price:
-                    change_pct = ((price - prev_close) / prev_close) * 100 if prev_close else 0
-                    daily_dir = "up" if change_pct > 0 else "down" if change_pct < 0 else ""
-                    old_price = prev_prices.get(sym, price)
-                    flash = price != old_price
-                    prev_prices[sym] = price
-
-                    signals[f"{sym}_symbol"] = sym
-                    signals[f"{sym}_name"] = STOCK_NAMES[sym]
-                    signals[f"{sym}_price"] = f"${price:.2f}"
-                    signals[f"{sym}_change"] = f"{'+' if change_pct >= 0 else ''}{change_pct:.2f}%"
-                    signals[f"{sym}_dir"] = daily_dir
-                    signals[f"{sym}_ts"] = ts if flash else 0
-
-            w.sync(signals)
-        except (httpx.HTTPError, KeyError, ValueError) as e:
+                    if sym in quotes and quotes[sym][0] != price:
+                        changed.add(sym)
+                    quotes[sym] = (price, prev_close)
+                    # Format once per poll, not once per subscriber per push
+                    display[sym] = format_quote(price, prev_close)
+            price_state["changed"] = changed
+            price_state["ts"] = int(time.time() * 1000)
+            prices_ready.set()
+
+            # Later frames are identical for every client, so encode once and fan out;
+            # a poll where nothing moved sends nothing (keepalives hold the stream open)
+            signals = ticker_signals(first=False)
+            delta = ticker_delta(signals)
+            price_state["sent"] = signals
+            if delta:
+                frame = sse.signals(delta)
+                full_frame = None
+                for queue in ticker_subscribers:
+                    if queue.full():
+                        # Dropping an unsent delta would lose its fields, so catch up with everything
+                        queue.get_nowait()
+                        full_frame = full_frame or sse.signals(signals)
+                        queue.put_nowait(full_frame)
+                    else:
+                        queue.put_nowait(frame)
+        except Exception as e:  # yfinance raises its own and curl_cffi errors; one bad poll mustn't end the shared task
             print(f"Error fetching prices: {e}")
 
         await asyncio.sleep(TICKER_POLL_SECONDS)
 
 
+def ticker_signals(first: bool) -> dict:
+    """Ticker signals for the latest poll; first frames also carry the static fields."""
+    # Flash only on poll-to-poll change, never on a client's first frame
+    changed = set() if first else price_state["changed"]
+    ts = price_state["ts"]
+    signals = {}
+
+    # Nested per-symbol signals: one short key per field instead of a prefixed key each
+    for sym, (price_str, change_str, daily_dir) in price_state["display"].items():
+        quote = {
+            "price": price_str,
+            "change": change_str,
+            "dir": daily_dir,
+            "ts": ts if sym in changed else 0,
+        }
+        if first:
+            quote.update(TICKER_STATIC[sym])
+        signals[sym] = quote
+    return signals
+
+
+def ticker_delta(signals: dict) -> dict:
+    """Only the per-symbol fields that differ from the last pushed frame."""
+    sent = price_state["sent"]
+    delta = {}
+    for sym, quote in signals.items():
+        prev = sent.get(sym, {})
+        fields = {k: v for k, v in quote.items() if prev.get(k) != v}
+        if fields:
+            delta[sym] = fields  # Datastar merges nested signals, so untouched fields keep their values
+    return delta
+
+
+def start_price_poller() -> None:
+    """Start the shared poller on first use (or restart it if it died)."""
+    global price_poller
+    if price_poller is None or price_poller.done():
+        price_poller = asyncio.create_task(poll_prices())
+
+
+async def stream_ticker(c: Context, w: Writer) -> None:
+    """Stream real stock prices from the shared Yahoo Finance poller."""
+    start_price_poller()
+    await prices_ready.wait()  # Don't send an empty frame before the first poll lands
+
+    queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=1)
+    ticker_subscribers.add(queue)
+    try:
+        w.sync(ticker_signals(first=True))  # Also starts the SSE response
+        async for _ in w.alive():
+            # Woken by the poller instead of re-checking on a timer; ping when idle
+            try:
+                frame = await asyncio.wait_for(queue.get(), TICKER_KEEPALIVE_SECONDS)
+            except TimeoutError:
+                frame = KEEPALIVE_FRAME
+            w.write(frame)
+    finally:
+        ticker_subscribers.discard(queue)
+
+
 async def search_words(c: Context, w: Writer) -> None:
     """Search dictionary and stream results as HTML."""
     signals = await c.signals()
@@ -335,33 +766,28 @@ async def search_words(c: Context, w: Writer) -> None:
         return
 
     query = q.lower()
-    all_matches = [word for word in WORDS if query in word.lower()]
-    matches = all_matches[:SEARCH_MAX_RESULTS]
-
-    items = []
-    for word in matches:
-        idx = word.lower().find(query)
-        if idx >= 0:
-            highlighted = f"{word[:idx]}<mark>{word[idx:idx+len(query)]}</mark>{word[idx+len(query):]}"
-        else:
-            highlighted = word
-        items.append(f'<li>{highlighted} <span class="def-btn" data-on:click="@get(\'/define/{word}\')" title="Get definition">?</span></li>')
-
-    html = f'<div id="results"><ul>{"".join(items)}</ul></div>'
+    matches, total = find_matches(query, SEARCH_MAX_RESULTS)
+
+    # The scan already located each match, so highlighting is just slicing
+    n = len(query)
+    items = "".join(
+        f'<li>{word[:idx]}<mark>{word[idx:idx+n]}</mark>{word[idx+n:]} <span class="def-btn" data-on:click="@get(\'/define/{word}\')" title="Get definition">?</span></li>'
+        for word, idx in matches
+    )
+
+    html = f'<div id="results"><ul>{items}</ul></div>'
     w.patch(SafeString(html))
-    w.sync({"count": len(all_matches)})
+    w.sync({"count": total})
 
 
 async def define_word(c: Context, w: Writer) -> None:
     """Fetch word definition from free dictionary API."""
     word = c.req.tail or ""
 
-    async with httpx.AsyncClient() as client:
+    definition = definition_cache.get(word)
+    if definition is None:
         try:
-            resp = await client.get(
-                f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}",
-                timeout=API_TIMEOUT_SECONDS,
-            )
+            resp = await http_client.get(f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}")
             resp.raise_for_status()
             data = resp.json()
             meanings = data[0].get("meanings", [])
@@ -371,10 +797,13 @@ async def define_word(c: Context, w: Writer) -> None:
                 for d in m.get("definitions", [])[:2]:
                     defs.append(f"<em>({pos})</em> {d['definition']}")
             definition = "<br>".join(defs) if defs else "No definition found"
-        except httpx.HTTPStatusError:
+            cache_definition(word, definition)
+        except httpx.HTTPStatusError as e:
             definition = "Definition not found in dictionary"
+            if e.response.status_code == 404:  # A server hiccup shouldn't stick
+                cache_definition(word, definition)
         except (httpx.HTTPError, KeyError, IndexError):
-            definition = "Could not fetch definition"
+            definition = "Could not fetch definition"  # Not cached, so a retry can succeed
 
     html = f'<div id="definition"><strong>{word}</strong>: {definition} <span class="close-def" data-on:click="@get(\'/clear-def\')">×</span></div>'
     w.patch(SafeString(html))
@@ -392,46 +821,74 @@ async def clear_definition(c: Context, w: Writer) -> None:
 
 async def rsvp_start(c: Context, w: Writer) -> None:
     """Start or resume the RSVP reader."""
-    global rsvp_state
+    rsvp_state = reader_state(c, w)
 
-    if not rsvp_state.get("words"):
+    # A second start (another tab, a reload) takes over: end the playing loop before reading its position.
+    # Re-checked after waking, so when several starts race only the last one keeps playing
+    while not rsvp_state.idle.is_set():
+        stop_reader(rsvp_state)
+        await rsvp_state.idle.wait()
+
+    if not rsvp_state.words:
         w.sync({"running": False})
         return
 
-    rsvp_state["running"] = True
-    total = len(rsvp_state["words"])
-
-    while rsvp_state["running"] and rsvp_state["position"] < total:
-        word = rsvp_state["words"][rsvp_state["position"]]
-        parts = get_word_parts(word)
-        delay = SECONDS_PER_MINUTE / rsvp_state["wpm"]
-
-        w.sync({
-            **parts,
-            "wpm": rsvp_state["wpm"],
-            "progress": (rsvp_state["position"] + 1) / total,
-            "current_word": rsvp_state["position"] + 1,
-            "total_words": total,
-            "running": True,
-        })
-
-        rsvp_state["position"] += 1
-        await asyncio.sleep(delay)
+    rsvp_state.idle.clear()
+    try:
+        rsvp_state.running = True
+        rsvp_state.stopped.clear()
+        # Handlers that swap the text or move the position call stop_reader(), ending this loop,
+        # so the words and position can live in locals between ticks
+        words = rsvp_state.words
+        total = len(words)
+        position = rsvp_state.position
+        # Schedule words against the loop clock so encoding and writing don't slow the pace
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        # One payload for the whole run; sync() encodes it immediately, so updating it in place is safe
+        payload = {"total_words": total, "running": True}
+        progress_step = -1
+
+        # wait_for can time out in the same loop pass a pause lands in, so check stopped before each word too
+        while position < total and not rsvp_state.stopped.is_set():
+            # The client joins the three parts itself, so the whole word isn't sent as well
+            payload["before"], payload["orp"], payload["after"] = get_word_parts(words[position])
+            position += 1
+            payload["wpm"] = rsvp_state.wpm
+            if (step := position * PROGRESS_STEPS // total) != progress_step:
+                progress_step = step
+                payload["progress"] = position / total
+            else:
+                payload.pop("progress", None)  # Unchanged at the bar's resolution, so leave it out
+            payload["current_word"] = position
+            w.sync(payload)
+
+            rsvp_state.position = position  # Written every tick so a pause saves the right spot
+            # Read the delay per word so a speed change applies from the very next one
+            deadline = max(deadline + rsvp_state.delay, loop.time())  # After a long stall, resume instead of bursting
+            try:
+                # Wait out the word, but wake as soon as the reader is stopped
+                await asyncio.wait_for(rsvp_state.stopped.wait(), deadline - loop.time())
+                break
+            except TimeoutError:
+                pass
 
-    if rsvp_state["position"] >= total:
-        rsvp_state["running"] = False
-        w.sync({"running": False, "progress": 1.0, "completed": True, "word": ""})
+        if rsvp_state.position >= total:
+            rsvp_state.running = False
+            w.sync({"running": False, "progress": 1.0, "completed": True, "before": "", "orp": "", "after": ""})
+    finally:
+        rsvp_state.idle.set()
 
 
 async def rsvp_pause(c: Context, w: Writer) -> None:
     """Pause the RSVP reader and save position to current text."""
-    global rsvp_state
-    rsvp_state["running"] = False
+    rsvp_state = reader_state(c, w)
+    stop_reader(rsvp_state)
 
-    text_id = rsvp_state.get("text_id")
+    text_id = rsvp_state.text_id
     if text_id and text_id in rsvp_library:
-        rsvp_library[text_id]["position"] = rsvp_state["position"]
-        rsvp_library[text_id]["wpm"] = rsvp_state["wpm"]
+        rsvp_library[text_id]["position"] = rsvp_state.position
+        rsvp_library[text_id]["wpm"] = rsvp_state.wpm
         save_rsvp_library()
 
     w.sync({"running": False})
@@ -439,18 +896,18 @@ async def rsvp_pause(c: Context, w: Writer) -> None:
 
 async def rsvp_reset(c: Context, w: Writer) -> None:
     """Reset position for current text (start from beginning)."""
-    global rsvp_state
-    rsvp_state["running"] = False
-    rsvp_state["position"] = 0
+    rsvp_state = reader_state(c, w)
+    stop_reader(rsvp_state)
+    rsvp_state.position = 0
 
-    text_id = rsvp_state.get("text_id")
+    text_id = rsvp_state.text_id
     if text_id and text_id in rsvp_library:
         rsvp_library[text_id]["position"] = 0
         save_rsvp_library()
 
-    total = len(rsvp_state.get("words", []))
+    total = len(rsvp_state.words)
     w.sync({
-        "word": "", "before": "", "orp": "", "after": "",
+        "before": "", "orp": "", "after": "",
         "progress": 0, "running": False,
         "current_word": 0, "total_words": total, "completed": False,
     })
@@ -458,41 +915,41 @@ async def rsvp_reset(c: Context, w: Writer) -> None:
 
 async def rsvp_slower(c: Context, w: Writer) -> None:
     """Decrease reading speed."""
-    global rsvp_state
-    rsvp_state["wpm"] = max(MIN_WPM, rsvp_state["wpm"] - WPM_STEP)
-    w.sync({"wpm": rsvp_state["wpm"]})
+    rsvp_state = reader_state(c, w)
+    set_reader_wpm(rsvp_state, max(MIN_WPM, rsvp_state.wpm - WPM_STEP))
+    w.sync({"wpm": rsvp_state.wpm})
 
 
 async def rsvp_faster(c: Context, w: Writer) -> None:
     """Increase reading speed."""
-    global rsvp_state
-    rsvp_state["wpm"] = min(MAX_WPM, rsvp_state["wpm"] + WPM_STEP)
-    w.sync({"wpm": rsvp_state["wpm"]})
+    rsvp_state = reader_state(c, w)
+    set_reader_wpm(rsvp_state, min(MAX_WPM, rsvp_state.wpm + WPM_STEP))
+    w.sync({"wpm": rsvp_state.wpm})
 
 
 async def rsvp_toggle(c: Context, w: Writer) -> None:
     """Pause reading via keyboard shortcut."""
-    global rsvp_state
-    if rsvp_state["running"]:
-        rsvp_state["running"] = False
+    rsvp_state = reader_state(c, w)
+    if rsvp_state.running:
+        stop_reader(rsvp_state)
         w.sync({"running": False})
 
 
 async def rsvp_set_wpm(c: Context, w: Writer) -> None:
     """Set WPM directly from user input."""
-    global rsvp_state
+    rsvp_state = reader_state(c, w)
     wpm_str = c.req.query.get("wpm", str(DEFAULT_WPM))
     try:
         wpm = max(MIN_WPM, min(MAX_WPM, int(wpm_str)))
     except ValueError:
         wpm = DEFAULT_WPM
-    rsvp_state["wpm"] = wpm
+    set_reader_wpm(rsvp_state, wpm)
     w.sync({"wpm": wpm})
 
 
 async def rsvp_library_load(c: Context, w: Writer) -> None:
     """Load a text from library into active reading state."""
-    global rsvp_state
+    rsvp_state = reader_state(c, w)
 
     text_id = c.req.tail or ""
     if not text_id or text_id not in rsvp_library:
@@ -500,38 +957,42 @@ async def rsvp_library_load(c: Context, w: Writer) -> None:
         return
 
     entry = rsvp_library[text_id]
-    words = entry.get("words", [])
-
-    if not words and entry.get("text"):
-        words = split_into_words(entry["text"])
-        entry["words"] = words
+    try:
+        words = load_words(text_id)
+    except FileNotFoundError:
+        # Its files are gone (e.g. lost to a crash before the index caught up), so drop the entry
+        del rsvp_library[text_id]
+        words_to_delete.add(text_id)  # Either file may survive alone; clear it once the index drops the entry
         save_rsvp_library()
+        w.sync({"error": "Text not found", "library": build_library_items()})
+        return
 
-    rsvp_state["text_id"] = text_id
-    rsvp_state["words"] = words
-    rsvp_state["position"] = entry.get("position", 0)
-    rsvp_state["wpm"] = entry.get("wpm", DEFAULT_WPM)
-    rsvp_state["running"] = False
+    rsvp_state.text_id = text_id
+    rsvp_state.text_key = None
+    rsvp_state.words = words
+    rsvp_state.position = entry.get("position", 0)
+    set_reader_wpm(rsvp_state, entry.get("wpm", DEFAULT_WPM))
+    stop_reader(rsvp_state)
 
     total = len(words)
-    position = rsvp_state["position"]
+    position = rsvp_state.position
 
     w.sync({
         "text_id": text_id,
         "title": entry.get("title", "Untitled"),
-        "wpm": rsvp_state["wpm"],
+        "wpm": rsvp_state.wpm,
         "total_words": total,
         "current_word": position,
         "progress": position / total if total else 0,
         "running": False, "completed": False,
         "textLoaded": True,
-        "word": "", "before": "", "orp": "", "after": "",
+        "before": "", "orp": "", "after": "",
     })
 
 
 async def rsvp_library_save(c: Context, w: Writer) -> None:
     """Save text to library with title."""
-    global rsvp_state
+    rsvp_state = reader_state(c, w)
 
     title = ""
     text = ""
@@ -542,33 +1003,50 @@ async def rsvp_library_save(c: Context, w: Writer) -> None:
     except (ValueError, KeyError):
         pass  # May fail with large text — fall back to server-side state
 
+    # Pasting the text that's already loaded keeps its entry and position instead of re-splitting it
+    text_key = (len(text), hash(text)) if text else None
+    if text_key and text_key == rsvp_state.text_key and rsvp_state.text_id in rsvp_library:
+        entry = rsvp_library[rsvp_state.text_id]
+        if title and title != entry["title"]:
+            entry["title"] = title  # Same text under a new name: rename the entry rather than drop the title
+            save_rsvp_library()
+        position = rsvp_state.position
+        total = len(rsvp_state.words)
+        w.sync({
+            "text_id": rsvp_state.text_id,
+            "title": entry["title"],
+            "total_words": total,
+            "current_word": position,
+            "progress": position / total if total else 0,
+            "library": build_library_items(),
+            "saveTitle": "",
+        })
+        return
+
     if not title:
-        title = rsvp_state.get("pending_title", "Untitled")
+        title = rsvp_state.pending_title or "Untitled"
 
-    words = rsvp_state.get("words", [])
-    if not text and words:
-        text = " ".join(words)
-    elif text:
-        words = split_into_words(text)
+    words = split_into_words(text) if text else rsvp_state.words
 
     if not words or len(words) < MIN_WORDS_TO_SAVE:
         w.sync({"error": "Text too short"})
         return
 
     text_id = str(uuid.uuid4())[:TEXT_ID_LENGTH]
+    # Only metadata goes into the JSON; the words live in their own mapped file
     rsvp_library[text_id] = {
         "title": title,
-        "text": text,
-        "words": words,
+        "word_count": write_words(text_id, words),
         "position": 0,
-        "wpm": rsvp_state.get("wpm", DEFAULT_WPM),
+        "wpm": rsvp_state.wpm,
     }
     save_rsvp_library()
 
-    rsvp_state["text_id"] = text_id
-    rsvp_state["words"] = words
-    rsvp_state["position"] = 0
-    rsvp_state["running"] = False
+    rsvp_state.text_id = text_id
+    rsvp_state.text_key = text_key
+    rsvp_state.words = WordsFile(text_id)
+    rsvp_state.position = 0
+    stop_reader(rsvp_state)
 
     w.sync({
         "text_id": text_id,
@@ -583,7 +1061,7 @@ async def rsvp_library_save(c: Context, w: Writer) -> None:
 
 async def rsvp_library_delete(c: Context, w: Writer) -> None:
     """Delete a text from library."""
-    global rsvp_state
+    rsvp_state = reader_state(c, w)
 
     text_id = c.req.tail or ""
     if not text_id or text_id not in rsvp_library:
@@ -592,14 +1070,18 @@ async def rsvp_library_delete(c: Context, w: Writer) -> None:
     del rsvp_library[text_id]
     save_rsvp_library()
 
-    was_active = rsvp_state.get("text_id") == text_id
-    if was_active:
-        rsvp_state["text_id"] = None
-        rsvp_state["words"] = []
-        rsvp_state["position"] = 0
+    was_active = rsvp_state.text_id == text_id
+    # The library is shared, so any other reader on this text loses it too
+    for state in rsvp_sessions.values():
+        if state.text_id == text_id:
+            stop_reader(state)
+            state.text_id = None
+            state.words = []
+            state.position = 0
+    words_to_delete.add(text_id)  # Removed once the index without this entry is on disk
 
     w.sync({
-        "text_id": None if was_active else rsvp_state.get("text_id"),
+        "text_id": None if was_active else rsvp_state.text_id,
         "library": build_library_items(),
         "textLoaded": False if was_active else None,
         "total_words": 0 if was_active else None,
@@ -620,24 +1102,28 @@ def _get_epub_spine(zf: zipfile.ZipFile) -> tuple[str, str, dict, list]:
     opf_path = rootfile.get("full-path") if rootfile is not None else "content.opf"
 
     opf_dir = "/".join(opf_path.split("/")[:-1])
-    opf_root = ET.fromstring(zf.read(opf_path))
-
-    title_el = opf_root.find(".//{http://purl.org/dc/elements/1.1/}title")
-    title = title_el.text if title_el is not None else "Untitled EPUB"
 
+    # One streaming pass over the OPF picks up title, manifest and spine together
+    title = None
     manifest: dict[str, str] = {}
-    for item in opf_root.findall(".//{http://www.idpf.org/2007/opf}item"):
-        item_id = item.get("id")
-        href = item.get("href")
-        media = item.get("media-type", "")
-        if item_id and href and "html" in media:
-            manifest[item_id] = href
-
-    spine_ids = []
-    for itemref in opf_root.findall(".//{http://www.idpf.org/2007/opf}itemref"):
-        idref = itemref.get("idref")
-        if idref and idref in manifest:
-            spine_ids.append(idref)
+    spine_refs = []
+    for _, elem in ET.iterparse(io.BytesIO(zf.read(opf_path))):
+        tag = elem.tag
+        if tag == OPF_ITEM_TAG:
+            item_id = elem.get("id")
+            href = elem.get("href")
+            if item_id and href and "html" in elem.get("media-type", ""):
+                manifest[item_id] = href
+        elif tag == OPF_ITEMREF_TAG:
+            idref = elem.get("idref")
+            if idref:
+                spine_refs.append(idref)
+        elif tag == OPF_TITLE_TAG and title is None:
+            title = elem.text or ""
+        elem.clear()
+
+    title = title or "Untitled EPUB"
+    spine_ids = [idref for idref in spine_refs if idref in manifest]
 
     return title, opf_dir, manifest, spine_ids
 
@@ -646,81 +1132,111 @@ def _extract_chapter_text(zf: zipfile.ZipFile, opf_dir: str, href: str) -> list[
     """Extract paragraph text from a single EPUB chapter."""
     chapter_path = f"{opf_dir}/{href}" if opf_dir else href
     chapter_html = zf.read(chapter_path).decode("utf-8", errors="ignore")
-    soup = BeautifulSoup(chapter_html, "html.parser")
+    soup = BeautifulSoup(chapter_html, HTML_PARSER)
     for tag in soup.find_all(["script", "style"]):
         tag.decompose()
     return [p.get_text(strip=True) for p in soup.find_all(["p", "h1", "h2", "h3", "h4"]) if p.get_text(strip=True)]
 
 
-def parse_epub(epub_data: bytes) -> tuple[str, str]:
-    """Parse EPUB file and extract title and text."""
+def parse_epub(epub_data: bytes) -> tuple[str, list[str]]:
+    """Parse EPUB file and extract title and words."""
     try:
         with zipfile.ZipFile(io.BytesIO(epub_data)) as zf:
             title, opf_dir, manifest, spine_ids = _get_epub_spine(zf)
 
-            all_text: list[str] = []
+            # Split each paragraph as it comes rather than joining the whole book first
+            words: list[str] = []
             for item_id in spine_ids:
                 href = manifest[item_id]
                 try:
-                    all_text.extend(_extract_chapter_text(zf, opf_dir, href))
+                    for paragraph in _extract_chapter_text(zf, opf_dir, href):
+                        words.extend(split_into_words(paragraph))
                 except (KeyError, UnicodeDecodeError):
                     continue
 
-            return title, " ".join(all_text)
+            return title, share_words(words)
     except (zipfile.BadZipFile, ET.ParseError, KeyError) as e:
         raise ValueError(f"Failed to parse EPUB: {e}") from e
 
 
+def epub_digest(epub_data: bytes) -> bytes:
+    """Cache key for an uploaded EPUB."""
+    return hashlib.blake2b(epub_data, digest_size=16).digest()
+
+
+async def parse_epub_cached(epub_data: bytes) -> tuple[str, list[str]]:
+    """Parse an EPUB, reusing the result if the same file was parsed recently."""
+    # Hashing and parsing run in worker threads; epub_cache is only read and written here, on the loop
+    digest = await asyncio.to_thread(epub_digest, epub_data)
+    if digest in epub_cache:
+        epub_cache.move_to_end(digest)  # A book that keeps coming back shouldn't be the next one evicted
+        return epub_cache[digest]
+    result = await asyncio.to_thread(parse_epub, epub_data)  # Failures raise, so only good parses are remembered
+    # Another upload of the same file may have finished parsing meanwhile; don't evict for a duplicate
+    if digest not in epub_cache and len(epub_cache) >= EPUB_CACHE_SIZE:
+        epub_cache.popitem(last=False)
+    epub_cache[digest] = result
+    epub_cache.move_to_end(digest)
+    return result
+
+
 def _extract_epub_from_multipart(body: bytes, content_type: str) -> bytes | None:
     """Extract EPUB file data from multipart form body."""
     if "boundary=" not in content_type:
         return None
 
-    boundary = content_type.split("boundary=")[1].split(";")[0].strip()
-    parts = body.split(f"--{boundary}".encode())
-
-    for part in parts:
-        if b"filename=" not in part or b".epub" not in part.lower():
-            continue
-        header_end = part.find(b"\r\n\r\n")
-        if header_end <= 0:
-            continue
-        epub_data = part[header_end + len(b"\r\n\r\n"):]
-        if epub_data.endswith(b"--\r\n"):
-            epub_data = epub_data[:-len(b"--\r\n")]
-        elif epub_data.endswith(b"\r\n"):
-            epub_data = epub_data[:-len(b"\r\n")]
-        return epub_data
+    boundary = content_type.split("boundary=")[1].split(";")[0].strip().strip('"')
+    delimiter = f"--{boundary}".encode()
+
+    # Walk the delimiters with find() and copy only the file's bytes, instead of
+    # splitting the whole upload into a second list of parts
+    start = body.find(delimiter)
+    while start >= 0:
+        end = body.find(delimiter, start + len(delimiter))
+        part_end = end if end >= 0 else len(body)
+        header_end = body.find(b"\r\n\r\n", start, part_end)
+        if header_end > 0:
+            headers = body[start:header_end]
+            if b"filename=" in headers and b".epub" in headers.lower():
+                data_start = header_end + len(b"\r\n\r\n")
+                if body.endswith(b"--\r\n", data_start, part_end):
+                    part_end -= len(b"--\r\n")
+                elif body.endswith(b"\r\n", data_start, part_end):
+                    part_end -= len(b"\r\n")
+                return body[data_start:part_end]
+        start = end
 
     return None
 
 
 async def rsvp_import_epub(c: Context, w: Writer) -> None:
     """Import EPUB file - returns JSON for JavaScript handling."""
-    global rsvp_state
+    rsvp_state = reader_state(c, w)
 
     try:
         body = await c.req.body()
-        content_type = c.req.headers.get("content-type", "")
+        # Stario hands header values over as bytes; a multipart boundary is plain ASCII
+        content_type = c.req.headers.get("content-type", b"").decode("latin-1")
         epub_data = _extract_epub_from_multipart(body, content_type)
 
         if not epub_data:
             w.respond(json.dumps({"error": "No EPUB file found"}).encode(), b"application/json")
             return
 
-        title, text = parse_epub(epub_data)
-        words = split_into_words(text)
+        # Unzipping and parsing a whole book is blocking work; parse_epub_cached keeps it off the loop
+        title, words = await parse_epub_cached(epub_data)
 
         if len(words) < MIN_EPUB_WORDS:
             w.respond(json.dumps({"error": "EPUB has too little text"}).encode(), b"application/json")
             return
 
-        rsvp_state["words"] = words
-        rsvp_state["position"] = 0
-        rsvp_state["text_id"] = None
-        rsvp_state["pending_title"] = title
+        stop_reader(rsvp_state)
+        rsvp_state.words = words
+        rsvp_state.position = 0
+        rsvp_state.text_id = None
+        rsvp_state.pending_title = title
 
-        preview = text[:PREVIEW_LENGTH] + "..." if len(text) > PREVIEW_LENGTH else text
+        preview = text_preview(words)
         w.respond(json.dumps({
             "success": True,
             "title": title,
@@ -738,18 +1254,23 @@ async def rsvp_import_epub(c: Context, w: Writer) -> None:
 
 
 async def _fetch_url_content(url: str) -> str:
-    """Fetch HTML content from a URL."""
-    async with httpx.AsyncClient(follow_redirects=True) as client:
-        resp = await client.get(url, timeout=URL_IMPORT_TIMEOUT_SECONDS, headers={
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-        })
+    """Fetch HTML content from a URL, reading at most URL_IMPORT_MAX_BYTES of it."""
+    async with http_client.stream("GET", url, follow_redirects=True, timeout=URL_IMPORT_TIMEOUT_SECONDS, headers={
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+    }) as resp:
         resp.raise_for_status()
-        return resp.text
+        body = bytearray()
+        async for chunk in resp.aiter_bytes():
+            body += chunk
+            if len(body) >= URL_IMPORT_MAX_BYTES:
+                break  # Closing the stream early drops the rest of a huge page unread
+        # A cut can split a multibyte character, so decode leniently
+        return body[:URL_IMPORT_MAX_BYTES].decode(resp.charset_encoding or "utf-8", errors="replace")
 
 
 def _extract_article_text(html: str) -> tuple[str, str]:
     """Extract article title and body text from HTML."""
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, HTML_PARSER)
 
     # Get title
     title = ""
@@ -758,7 +1279,7 @@ def _extract_article_text(html: str) -> tuple[str, str]:
     og_title = soup.find("meta", property="og:title")
     if og_title and og_title.get("content"):
         title = og_title["content"]
-    title = re.sub(r'\s+', ' ', title).strip()[:MAX_TITLE_LENGTH]
+    title = " ".join(title.split())[:MAX_TITLE_LENGTH]
 
     # Remove noise elements
     for tag in soup.find_all(NOISE_TAGS):
@@ -782,11 +1303,12 @@ def _extract_article_text(html: str) -> tuple[str, str]:
             if len(p.get_text(strip=True)) > MIN_PARAGRAPH_LENGTH
         )
 
-    return title, re.sub(r'\s+', ' ', article_text).strip()
+    return title, " ".join(article_text.split())
 
 
 async def rsvp_import_url(c: Context, w: Writer) -> None:
     """Import article text from a URL."""
+    rsvp_state = reader_state(c, w)
     try:
         signals = await c.signals()
         url = sig(signals, "importUrl").strip()
@@ -804,20 +1326,21 @@ async def rsvp_import_url(c: Context, w: Writer) -> None:
         w.sync({"importError": f"Failed to fetch: {str(e)[:ERROR_PREVIEW_LENGTH]}"})
         return
 
-    title, article_text = _extract_article_text(html)
+    title, article_text = await asyncio.to_thread(_extract_article_text, html)
 
     if len(article_text) < MIN_ARTICLE_LENGTH:
         w.sync({"importError": "Could not extract article text from this URL"})
         return
 
-    words = split_into_words(article_text)
+    words = share_words(split_into_words(article_text))
 
-    rsvp_state["words"] = words
-    rsvp_state["position"] = 0
-    rsvp_state["text_id"] = None
-    rsvp_state["pending_title"] = title or "Imported Article"
+    stop_reader(rsvp_state)
+    rsvp_state.words = words
+    rsvp_state.position = 0
+    rsvp_state.text_id = None
+    rsvp_state.pending_title = title or "Imported Article"
 
-    preview = article_text[:PREVIEW_LENGTH] + "..." if len(article_text) > PREVIEW_LENGTH else article_text
+    preview = text_preview(words)
     w.sync({
         "importUrl": "",
         "importError": "",
@@ -836,36 +1359,52 @@ async def rsvp_import_url(c: Context, w: Writer) -> None:
 # =============================================================================
 
 
+# Every route as (method, path, handler); the router rejects a duplicate method + path at startup
+ROUTES = (
+    ("GET", "/", index),
+    ("GET", "/typewriter", typewriter_page),
+    ("GET", "/ticker", ticker_page),
+    ("GET", "/search", search_page),
+    ("GET", "/rsvp", rsvp_page),
+    ("GET", "/load/*", load_stage),
+    ("GET", "/stream-typewriter", stream_typewriter),
+    ("GET", "/stream-ticker", stream_ticker),
+    ("GET", "/search-words", search_words),
+    ("GET", "/define/*", define_word),
+    ("GET", "/clear-def", clear_definition),
+    ("POST", "/rsvp/start", rsvp_start),
+    ("POST", "/rsvp/pause", rsvp_pause),
+    ("POST", "/rsvp/reset", rsvp_reset),
+    ("POST", "/rsvp/slower", rsvp_slower),
+    ("POST", "/rsvp/faster", rsvp_faster),
+    ("POST", "/rsvp/toggle", rsvp_toggle),
+    ("POST", "/rsvp/set-wpm", rsvp_set_wpm),
+    ("POST", "/rsvp/library/load/*", rsvp_library_load),
+    ("POST", "/rsvp/library/save", rsvp_library_save),
+    ("POST", "/rsvp/library/delete/*", rsvp_library_delete),
+    ("POST", "/rsvp/import-url", rsvp_import_url),
+    ("POST", "/rsvp/import-epub", rsvp_import_epub),
+)
+
+
 async def main() -> None:
-    with RichTracer() as tracer:
+    with (RichTracer() if DEV else QuietTracer()) as tracer:
         app = Stario(tracer)
 
-        app.get("/", index)
-        app.get("/typewriter", typewriter_page)
-        app.get("/ticker", ticker_page)
-        app.get("/search", search_page)
-        app.get("/rsvp", rsvp_page)
-        app.get("/load/*", load_stage)
-        app.get("/stream-typewriter", stream_typewriter)
-        app.get("/stream-ticker", stream_ticker)
-        app.get("/search-words", search_words)
-        app.get("/define/*", define_word)
-        app.get("/clear-def", clear_definition)
-        app.post("/rsvp/start", rsvp_start)
-        app.post("/rsvp/pause", rsvp_pause)
-        app.post("/rsvp/reset", rsvp_reset)
-        app.post("/rsvp/slower", rsvp_slower)
-        app.post("/rsvp/faster", rsvp_faster)
-        app.post("/rsvp/toggle", rsvp_toggle)
-        app.post("/rsvp/set-wpm", rsvp_set_wpm)
-        app.post("/rsvp/library/load/*", rsvp_library_load)
-        app.post("/rsvp/library/save", rsvp_library_save)
-        app.post("/rsvp/library/delete/*", rsvp_library_delete)
-        app.post("/rsvp/import-url", rsvp_import_url)
-        app.post("/rsvp/import-epub", rsvp_import_epub)
+        for method, path, handler in ROUTES:
+            app.handle(method, path, handler)
+
+        migrate_rsvp_library()
 
         print(f"Starting Stario server at http://{SERVER_HOST}:{SERVER_PORT}")
-        await app.serve(host=SERVER_HOST, port=SERVER_PORT)
+        PID_FILE.write_text(str(os.getpid()))
+        try:
+            await app.serve(host=SERVER_HOST, port=SERVER_PORT)
+        finally:
+            if library_dirty.is_set():
+                write_rsvp_library(library_json(), words_to_delete)  # Don't drop a save still waiting out the debounce
+            await http_client.aclose()
+            PID_FILE.unlink(missing_ok=True)
 
 
 if __name__ == "__main__":
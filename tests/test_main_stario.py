@@ -0,0 +1,94 @@
+"""
+Tests for the Stario demo handlers.
+
+Run from the repo root (templates and data files are relative): uv run --with pytest pytest
+"""
+import asyncio
+import io
+import types
+import zipfile
+
+from stario.testing import ResponseRecorder, TestRequest
+
+import main_stario
+
+
+class SnapshotRecorder(ResponseRecorder):
+    """ResponseRecorder that copies each synced dict, since rsvp_start reuses one payload."""
+
+    def sync(self, data, *, only_if_missing=False):
+        super().sync(dict(data), only_if_missing=only_if_missing)
+
+    def frames(self) -> list[dict]:
+        return [e["data"] for e in self.datastar_events if e["type"] == "sync"]
+
+
+def reader_with_words(monkeypatch, words: list[str]) -> main_stario.ReaderState:
+    """A reader that every handler resolves to, loaded with words."""
+    state = main_stario.ReaderState()
+    state.words = words
+    monkeypatch.setattr(main_stario, "reader_state", lambda c, w: state)
+    return state
+
+
+def test_rsvp_start_sends_nothing_after_pause_at_the_deadline(monkeypatch):
+    state = reader_with_words(monkeypatch, ["one", "two", "three"])
+
+    async def pause_on_deadline(aw, timeout):
+        # The word's timer and the pause fire in the same loop pass: stopped is set, yet wait_for times out
+        aw.close()
+        main_stario.stop_reader(state)
+        raise TimeoutError
+
+    monkeypatch.setattr(main_stario.asyncio, "wait_for", pause_on_deadline)
+    w = SnapshotRecorder()
+    asyncio.run(main_stario.rsvp_start(None, w))
+
+    frames = w.frames()
+    assert [f["current_word"] for f in frames] == [1]
+    assert state.position == 1
+    assert not state.running
+
+
+def make_epub(title: str, paragraphs: list[str]) -> bytes:
+    """A minimal EPUB: container, OPF with one spine chapter, and the chapter itself."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("META-INF/container.xml", (
+            '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+            '<rootfile full-path="OEBPS/content.opf"/></rootfiles></container>'
+        ))
+        zf.writestr("OEBPS/content.opf", (
+            '<package xmlns="http://www.idpf.org/2007/opf" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f"<metadata><dc:title>{title}</dc:title></metadata>"
+            '<manifest><item id="ch1" href="ch1.xhtml" media-type="application/xhtml+xml"/></manifest>'
+            '<spine><itemref idref="ch1"/></spine></package>'
+        ))
+        zf.writestr("OEBPS/ch1.xhtml", "<html><body>" + "".join(f"<p>{p}</p>" for p in paragraphs) + "</body></html>")
+    return buf.getvalue()
+
+
+def test_rsvp_import_epub_reads_a_multipart_upload(monkeypatch):
+    state = reader_with_words(monkeypatch, [])
+    text = "one two three four five six seven eight nine ten eleven twelve"
+    boundary = "----datastarBoundary"
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="book.epub"\r\n'
+        "Content-Type: application/epub+zip\r\n\r\n"
+    ).encode() + make_epub("Test Book", [text]) + f"\r\n--{boundary}--\r\n".encode()
+    req = TestRequest(
+        method="POST",
+        path="/rsvp/import-epub",
+        headers={"content-type": f"multipart/form-data; boundary={boundary}"},
+        body=body,
+    )
+
+    w = ResponseRecorder()
+    asyncio.run(main_stario.rsvp_import_epub(types.SimpleNamespace(req=req), w))
+
+    result = w.json_body()
+    assert result["success"] is True
+    assert result["title"] == "Test Book"
+    assert result["total_words"] == 12
+    assert list(state.words) == text.split()